@@ -2,31 +2,28 @@ from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import pandas as pd
-import os
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from dotenv import load_dotenv
-from supabase import create_client
+from src.api.utils.supabase_client import get_client
 from datetime import datetime, timedelta
 
 # --- CONFIGURATION ---
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 app = FastAPI(title="Bike Traffic Dashboard API")
 
 # -----------------------------
 # Helper Functions
 # -----------------------------
 def get_supabase():
-    """Initialize and return Supabase client."""
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    """Return the shared storage client (Supabase, or local SQLite if STORAGE_BACKEND=sqlite)."""
+    try:
+        return get_client()
+    except ValueError:
         raise HTTPException(500, "Supabase credentials are missing in .env")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def format_date_fr(dt_obj: datetime) -> str:
     """Format a datetime object into French human-readable string."""
@@ -45,6 +42,7 @@ async def startup_refresh_predictions():
     if there are no predictions in the table for that date.
     """
     from src.api.routes.prediction_final.predict_hourly import run_prediction_pipeline
+    from src.api.utils.bulk_writer import bulk_insert
 
     supabase = get_supabase()
     target_date = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -64,7 +62,7 @@ async def startup_refresh_predictions():
 
         # Clear previous predictions and insert new ones
         supabase.table("predictions_hourly").delete().neq("id", -1).execute()
-        supabase.table("predictions_hourly").insert(predictions).execute()
+        bulk_insert("predictions_hourly", predictions, client=supabase)
         print(f"[STARTUP] Predictions for {target_date} inserted successfully ({len(predictions)} rows).")
 
     except Exception as e:
@@ -147,25 +145,17 @@ def api_stats():
     - Monthly totals
     - Weekly averages
     - Rain impact
-    Pagination-safe to avoid missing rows from Supabase.
+    Keyset-paginated so no rows are missed from Supabase.
     """
+    from src.api.utils.supabase_reader import fetch_table
+    from src.api.utils import parquet_mirror
+
     try:
-        supabase = get_supabase()
-        all_rows = []
-        offset, limit = 0, 1000
-        cols_needed = "timestamp, intensity, name, is_raining, nom_jour"
-
-        while True:
-            response = supabase.table("counters_final").select(cols_needed).range(offset, offset + limit - 1).execute()
-            rows = response.data
-            if not rows:
-                break
-            all_rows.extend(rows)
-            offset += limit
-            if len(rows) < limit:
-                break
-
-        df = pd.DataFrame(all_rows)
+        cols_needed = ["timestamp", "intensity", "name", "is_raining", "nom_jour"]
+        if parquet_mirror.DATA_SOURCE == "mirror":
+            df = parquet_mirror.read_mirror("counters_final", columns=cols_needed)
+        else:
+            df = fetch_table("counters_final", columns=cols_needed, client=get_supabase())
         if df.empty:
             return {"kpi": {}, "monthly": {}, "weekly": {}, "weather": {}}
 
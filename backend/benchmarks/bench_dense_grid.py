@@ -0,0 +1,85 @@
+# benchmarks/bench_dense_grid.py
+"""
+Grille horaire + interpolation de /process_top10 : ancienne version pandas
+(cross merge, groupby/interpolate, isoformat ligne à ligne) contre la grille dense NumPy.
+
+Usage (depuis backend/) : python -m benchmarks.bench_dense_grid [--days 365] [--counters 10 100 500]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.api.utils.dense_grid import dense_clean_grid
+
+
+def synthetic_counters(n_counters: int, days: int, missing: float = 0.1, seed: int = 0) -> pd.DataFrame:
+    """Relevés horaires aléatoires, avec une part `missing` d'heures absentes."""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2023-01-01", periods=days * 24, freq="h", tz="UTC")
+    names = [f"Compteur {i:03d}" for i in range(n_counters)]
+    df = pd.DataFrame({
+        "name": np.repeat(names, len(hours)),
+        "timestamp": np.tile(hours, n_counters),
+        "intensity": rng.poisson(40, n_counters * len(hours)),
+        "latitude": np.repeat(rng.uniform(43.5, 43.7, n_counters), len(hours)),
+        "longitude": np.repeat(rng.uniform(3.8, 3.95, n_counters), len(hours)),
+    })
+    return df[rng.random(len(df)) >= missing].reset_index(drop=True)
+
+
+def legacy_grid(df: pd.DataFrame, names) -> pd.DataFrame:
+    """Étapes 5 à 7 de l'ancien process_top10."""
+    df_top = df[df['name'].isin(names)].copy()
+    meta_coords = df_top[['name', 'latitude', 'longitude']].drop_duplicates(subset=['name'])
+    full_time_range = pd.date_range(start=df['timestamp'].min(), end=df['timestamp'].max(), freq='h', name='timestamp')
+
+    df_grid = pd.DataFrame({'name': names}).merge(pd.DataFrame(full_time_range), how='cross')
+    df_final = df_grid.merge(
+        df_top[['timestamp', 'name', 'intensity']], on=['timestamp', 'name'], how='left'
+    ).merge(meta_coords, on='name', how='left')
+
+    df_final = df_final.sort_values(['name', 'timestamp'])
+    df_final['intensity'] = df_final.groupby('name')['intensity'].transform(
+        lambda g: g.interpolate(method='linear', limit_direction='both')
+    )
+    df_final['intensity'] = df_final['intensity'].fillna(0).round().astype(int)
+    df_final['timestamp'] = df_final['timestamp'].apply(lambda x: x.isoformat())
+    return df_final
+
+
+def dense_grid(df: pd.DataFrame, names) -> pd.DataFrame:
+    meta = df[['name', 'latitude', 'longitude']]
+    return dense_clean_grid(df, names, meta, df['timestamp'].min(), df['timestamp'].max())
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--counters", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    print(f"{'compteurs':>10} {'lignes':>12} {'pandas (s)':>12} {'dense (s)':>10} {'gain':>7}")
+    for n_counters in args.counters:
+        df = synthetic_counters(n_counters, args.days)
+        names = sorted(df['name'].unique())
+
+        old, t_old = _timed(legacy_grid, df, names)
+        new, t_new = _timed(dense_grid, df, names)
+
+        # Mêmes valeurs, mêmes timestamps, dans le même ordre (name, timestamp)
+        assert old['intensity'].tolist() == new['intensity'].tolist()
+        assert old['timestamp'].tolist() == new['timestamp'].tolist()
+
+        print(f"{n_counters:>10} {len(new):>12,} {t_old:>12.2f} {t_new:>10.2f} {t_old / t_new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
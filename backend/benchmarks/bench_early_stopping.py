@@ -0,0 +1,86 @@
+# benchmarks/bench_early_stopping.py
+"""
+Avant / après la fenêtre de validation de trainer.train_model :
+- avant : eval_set = train (l'early stopping ne se déclenche jamais -> 1000 arbres)
+- après : validation sur les VALIDATION_DAYS derniers jours avant CUTOFF_DATE, tree_method="hist"
+
+Par compteur : temps d'entraînement, taille de l'artefact joblib, latence de prédiction
+(24 heures, comme run_prediction_pipeline), nombre d'arbres et MAE sur la période de test.
+
+Usage (depuis backend/) : python -m benchmarks.bench_early_stopping [--counters 5] [--start 2024-01-01]
+"""
+import argparse
+import io
+import time
+
+import joblib
+import pandas as pd
+import xgboost as xgb
+
+from benchmarks.bench_parallel_training import synthetic_training_set
+from train_model_xgboost import evaluator, loader, trainer
+from train_model_xgboost.config import MAX_BIN, VALIDATION_DAYS
+
+
+def legacy_train_model(X_train, y_train):
+    """trainer.train_model avant la fenêtre de validation."""
+    model = xgb.XGBRegressor(
+        n_estimators=1000, learning_rate=0.05, max_depth=5, early_stopping_rounds=50,
+        objective='reg:squarederror', n_jobs=-1,
+    )
+    model.fit(X_train, y_train, eval_set=[(X_train, y_train)], verbose=False)
+    return model
+
+
+def _artifact_kb(model) -> float:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell() / 1024
+
+
+def _predict_ms(model, X, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counters", type=int, default=5)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2025-12-31")
+    args = parser.parse_args()
+
+    df = synthetic_training_set(args.counters, args.start, args.end)
+    groups = loader.counter_rows(df)
+
+    rows = []
+    for name, positions in groups.items():
+        X_full, y_full, X_test, y_test, _, _, _ = loader.get_data_for_counter(df, name, positions)
+        X_train, y_train, _, _, _, X_val, y_val = loader.get_data_for_counter(
+            df, name, positions, validation_days=VALIDATION_DAYS
+        )
+        X_day = X_test.iloc[:24]
+
+        for label, fit in (("avant", lambda: legacy_train_model(X_full, y_full)),
+                           ("après", lambda: trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val))):
+            start = time.perf_counter()
+            model = fit()
+            elapsed = time.perf_counter() - start
+            mae, _ = evaluator.evaluate(y_test, model.predict(X_test).clip(0))
+            rows.append({
+                "version": label, "entraînement (s)": elapsed, "artefact (Ko)": _artifact_kb(model),
+                "prédiction 24h (ms)": _predict_ms(model, X_day), "arbres": trainer.n_trees(model), "MAE": mae,
+            })
+
+    report = pd.DataFrame(rows).groupby("version", sort=False).mean().round(2)
+    print(f"\n{args.counters} compteurs, {args.start} -> {args.end} | validation {VALIDATION_DAYS} j, max_bin {MAX_BIN}")
+    print("Moyennes par compteur :")
+    print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_final_joins.py
+"""
+Jointures du dataset final : anciennes fusions pandas (grid MultiIndex, merge météo,
+merge calendrier, fillna) contre les jointures par indices de final_dataset/joins.py.
+Mesure le temps et le pic de mémoire résidente de chaque version, chacune dans un
+processus fils (fork) : VmHWM - VmRSS au démarrage, lus dans /proc (Linux). tracemalloc
+ne verrait pas les tables de hachage internes des merges pandas.
+
+Usage (depuis backend/) : python -m benchmarks.bench_final_joins [--years 3] [--counters 100]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.api.routes.final_dataset.joins import build_final_frame
+
+
+def synthetic_inputs(n_counters: int, years: int, seed: int = 0):
+    """counters_clean, meteo_history et calendar synthétiques (quelques heures/jours manquants)."""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2023-01-01", periods=years * 365 * 24, freq="h", tz="UTC")
+    names = [f"Compteur {i:03d}" for i in range(n_counters)]
+
+    df_velo = pd.DataFrame({
+        "name": np.repeat(names, len(hours)),
+        "timestamp": np.tile(hours, n_counters),
+        "intensity": rng.poisson(40, n_counters * len(hours)).astype(float),
+        "latitude": np.repeat(rng.uniform(43.5, 43.7, n_counters), len(hours)),
+        "longitude": np.repeat(rng.uniform(3.8, 3.95, n_counters), len(hours)),
+    })
+    df_velo = df_velo[rng.random(len(df_velo)) >= 0.02].reset_index(drop=True)
+
+    df_meteo = pd.DataFrame({
+        "timestamp": hours,
+        "temperature_2m": rng.normal(16, 7, len(hours)).round(1),
+        "precipitation": rng.exponential(0.2, len(hours)).round(1),
+        "precipitation_class": rng.integers(0, 4, len(hours)),
+        "is_raining": rng.integers(0, 2, len(hours)),
+        "windspeed_10m": rng.gamma(2, 5, len(hours)).round(1),
+    })
+    df_meteo = df_meteo[rng.random(len(df_meteo)) >= 0.01].reset_index(drop=True)
+
+    days = pd.date_range(hours[0].tz_localize(None), hours[-1].tz_localize(None), freq="D")
+    df_cal = pd.DataFrame({
+        "date": days,
+        "jour_semaine": days.dayofweek,
+        "is_weekend": (days.dayofweek >= 5).astype(int),
+        "nom_jour": days.day_name(),
+        "is_ferie": rng.integers(0, 2, len(days)),
+        "is_vacances": rng.integers(0, 2, len(days)),
+        "is_jour_ouvre": (days.dayofweek < 5).astype(int),
+    })
+    return df_velo, df_meteo, df_cal
+
+
+def legacy_join(df_velo, df_meteo, df_cal) -> pd.DataFrame:
+    """Étapes 2 à 4 de l'ancien run_final_pipeline."""
+    compteur_names = df_velo['name'].unique()
+    full_time_range = pd.date_range(df_velo['timestamp'].min(), df_velo['timestamp'].max(), freq='h', tz='UTC')
+    df_grid = pd.MultiIndex.from_product([compteur_names, full_time_range], names=['name', 'timestamp']).to_frame(index=False)
+
+    coords = df_velo.groupby('name')[['latitude', 'longitude']].first().reset_index()
+    df_grid = df_grid.merge(coords, on='name', how='left')
+    df_grid = df_grid.merge(df_velo[['name', 'timestamp', 'intensity']], on=['name', 'timestamp'], how='left')
+    df_grid['intensity'] = df_grid['intensity'].fillna(0)
+
+    df_merged = pd.merge(df_grid, df_meteo, on='timestamp', how='left')
+    for col in ['temperature_2m', 'precipitation', 'precipitation_class', 'is_raining', 'windspeed_10m']:
+        df_merged[col] = df_merged[col].fillna(0)
+
+    df_merged['date_join'] = df_merged['timestamp'].dt.tz_convert(None).dt.normalize()
+    df_final = pd.merge(df_merged, df_cal, left_on='date_join', right_on='date', how='left')
+    df_final = df_final.drop(columns=['date_join', 'date'])
+    for col in ['jour_semaine', 'is_weekend', 'nom_jour', 'is_ferie', 'is_vacances', 'is_jour_ouvre']:
+        df_final[col] = df_final[col].fillna(0)
+    return df_final
+
+
+def index_join(df_velo, df_meteo, df_cal) -> pd.DataFrame:
+    return build_final_frame(df_velo, df_meteo, df_cal, df_velo['timestamp'].min(), df_velo['timestamp'].max())
+
+
+def _proc_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def _child(func, args, queue):
+    baseline = _proc_kb("VmRSS")
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, (_proc_kb("VmHWM") - baseline) / 1024))
+
+
+def _measure(func, *args):
+    """(secondes, pic mémoire en Mo) de func(*args) dans un processus fils."""
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(func, args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--counters", type=int, default=100)
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.counters, args.years)
+
+    # Mesures d'abord, sur un tas encore "propre"
+    t_old, m_old = _measure(legacy_join, *inputs)
+    t_new, m_new = _measure(index_join, *inputs)
+
+    # Même contenu (l'ancienne version trie par nom, la nouvelle garde l'ordre d'apparition)
+    old = legacy_join(*inputs).sort_values(['name', 'timestamp'], ignore_index=True)
+    new = index_join(*inputs).astype({'name': str}).sort_values(['name', 'timestamp'], ignore_index=True)
+    pd.testing.assert_frame_equal(old, new[old.columns], check_dtype=False)
+    n_rows = len(new)
+
+    print(f"Grille : {args.counters} compteurs × {args.years} ans = {n_rows:,} lignes")
+    print(f"{'version':>10} {'temps (s)':>10} {'pic mémoire (Mo)':>18}")
+    print(f"{'merge':>10} {t_old:>10.2f} {m_old:>18.0f}")
+    print(f"{'indices':>10} {t_new:>10.2f} {m_new:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
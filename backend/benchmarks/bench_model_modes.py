@@ -0,0 +1,87 @@
+# benchmarks/bench_model_modes.py
+"""
+Un modèle par compteur contre un modèle global (compteur en feature catégorielle) :
+temps d'entraînement, MAE moyen par compteur (evaluator.evaluate_by_counter), nombre et
+taille des artefacts, latence de prédiction d'une journée pour tout le réseau
+(une boucle de predict par compteur contre un seul predict).
+
+Usage (depuis backend/) : python -m benchmarks.bench_model_modes [--counters 20] [--start 2024-01-01]
+"""
+import argparse
+import io
+import time
+
+import joblib
+import pandas as pd
+
+from benchmarks.bench_parallel_training import synthetic_training_set
+from train_model_xgboost import evaluator, loader, trainer
+from train_model_xgboost.config import VALIDATION_DAYS
+
+
+def _artifact_kb(model) -> float:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell() / 1024
+
+
+def _best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_counter(df, day):
+    models, scores = {}, []
+    start = time.perf_counter()
+    for name, rows in loader.counter_rows(df).items():
+        X_train, y_train, X_test, y_test, _, X_val, y_val = loader.get_data_for_counter(
+            df, name, rows, validation_days=VALIDATION_DAYS
+        )
+        models[name] = trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val)
+        scores.append(evaluator.evaluate(y_test, models[name].predict(X_test).clip(0))[0])
+    elapsed = time.perf_counter() - start
+
+    groups = {name: day[day['name'] == name][loader.FEATURES_XGBOOST] for name in models}
+    latency = _best_of(lambda: [models[name].predict(X) for name, X in groups.items()])
+    return {
+        "entraînement (s)": elapsed, "MAE moyen": sum(scores) / len(scores), "artefacts": len(models),
+        "taille (Ko)": sum(_artifact_kb(m) for m in models.values()), "prédiction 24h (ms)": latency * 1000,
+    }
+
+
+def global_model(df, day):
+    start = time.perf_counter()
+    X_train, y_train, X_test, y_test, _, X_val, y_val = loader.get_global_data(df, validation_days=VALIDATION_DAYS)
+    model = trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val)
+    scores = evaluator.evaluate_by_counter(X_test['name'], y_test, model.predict(X_test).clip(0))
+    elapsed = time.perf_counter() - start
+
+    X_day = day[loader.FEATURES_GLOBAL]
+    latency = _best_of(lambda: model.predict(X_day))
+    return {
+        "entraînement (s)": elapsed, "MAE moyen": pd.DataFrame(scores)["MAE"].mean(), "artefacts": 1,
+        "taille (Ko)": _artifact_kb(model), "prédiction 24h (ms)": latency * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counters", type=int, default=20)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2025-12-31")
+    args = parser.parse_args()
+
+    df = synthetic_training_set(args.counters, args.start, args.end)
+    day = loader.create_features(df[df['timestamp'].dt.normalize() == df['timestamp'].max().normalize()])
+
+    report = pd.DataFrame({"par compteur": per_counter(df, day), "global": global_model(df, day)}).T
+    print(f"\n{args.counters} compteurs, {args.start} -> {args.end}")
+    print(report.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_model_registry.py
+"""
+Chargement des modèles par la prédiction : un fichier joblib par compteur (ancien
+saver.save_model) contre registry.load_current (manifeste + boosters natifs en un appel).
+
+Mesure le temps de chargement de tous les modèles, la taille totale des artefacts et
+vérifie que les deux versions prédisent la même chose.
+Tout est écrit dans un dossier temporaire (les artefacts réels ne sont pas touchés).
+
+Usage (depuis backend/) : python -m benchmarks.bench_model_registry [--counters 50] [--start 2025-01-01]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_parallel_training import synthetic_training_set
+from train_model_xgboost import loader, pipeline_train, registry, saver
+
+
+def _best_of(func, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _size_kb(paths) -> float:
+    return sum(Path(p).stat().st_size for p in paths) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counters", type=int, default=50)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--end", default="2025-12-31")
+    args = parser.parse_args()
+
+    saver.ARTIFACTS_DIR = registry.ARTIFACTS_DIR = Path(tempfile.mkdtemp(prefix="bench_registry_"))
+    df = synthetic_training_set(args.counters, args.start, args.end)
+
+    run = registry.start_run("per_counter")
+    pipeline_train.train_counters(df, run=run)
+    registry.finish_run(run)
+
+    # Ancien format : un pickle joblib du XGBRegressor par compteur
+    names = list(run["models"])
+    for name in names:
+        joblib.dump(saver.load_model(name), saver.model_path(name))
+    legacy_paths = [saver.model_path(name) for name in names]
+
+    legacy_s, legacy = _best_of(lambda: {name: joblib.load(saver.model_path(name)) for name in names})
+    registry_s, (manifest, boosters) = _best_of(registry.load_current)
+
+    X = loader.create_features(df[df["name"] == names[0]]).tail(24)
+    same = np.allclose(legacy[names[0]].predict(X[loader.FEATURES_XGBOOST]),
+                       registry.predict(boosters[names[0]], manifest["models"][names[0]], X))
+
+    registry_paths = [registry.model_file(name, manifest) for name in names]
+    report = pd.DataFrame([
+        {"version": "joblib", "chargement (s)": legacy_s, "artefacts (Ko)": _size_kb(legacy_paths)},
+        {"version": "registre (ubj)", "chargement (s)": registry_s, "artefacts (Ko)": _size_kb(registry_paths)},
+    ]).round(3)
+
+    print(f"\n{len(names)} modèles | prédictions identiques : {same}")
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
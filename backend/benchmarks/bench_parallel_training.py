@@ -0,0 +1,84 @@
+# benchmarks/bench_parallel_training.py
+"""
+Entraînement XGBoost par compteur : boucle séquentielle (1 processus × tous les coeurs)
+contre pool de processus (pipeline_train.thread_budget), pour 10 et 100 compteurs.
+Les modèles sont écrits dans un dossier temporaire (les artefacts réels ne sont pas touchés).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_parallel_training [--counters 10 100] [--start 2024-01-01] [--end 2025-12-31]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.api.utils.schema import apply_schema
+from train_model_xgboost import pipeline_train, registry, saver
+
+
+def synthetic_training_set(n_counters: int, start: str, end: str, seed: int = 0) -> pd.DataFrame:
+    """Dataset au format de loader.load_full_dataset : cycles journaliers/hebdomadaires + bruit + météo."""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range(start, end, freq="h")
+    n = len(hours)
+
+    temperature = 15 + 8 * np.sin(2 * np.pi * hours.dayofyear / 365) + rng.normal(0, 3, n)
+    precipitation = np.where(rng.random(n) < 0.1, rng.exponential(1.5, n), 0).round(1)
+    weekend = (hours.dayofweek >= 5).astype(int)
+    daily = np.exp(-((hours.hour - 8) ** 2) / 4) + np.exp(-((hours.hour - 18) ** 2) / 6)
+
+    frames = []
+    for i in range(n_counters):
+        level = rng.uniform(20, 200)
+        intensity = level * daily * (1 - 0.4 * weekend) * (1 - 0.3 * (precipitation > 0))
+        frames.append(pd.DataFrame({
+            "name": f"Compteur {i:03d}",
+            "timestamp": hours,
+            "intensity": rng.poisson(np.maximum(intensity, 0)),
+            "latitude": rng.uniform(43.5, 43.7),
+            "longitude": rng.uniform(3.8, 3.95),
+            "temperature_2m": temperature.round(1),
+            "precipitation": precipitation,
+            "precipitation_class": np.digitize(precipitation, [0.01, 0.5, 4]),
+            "windspeed_10m": rng.gamma(2, 5, n).round(1),
+            "is_raining": (precipitation > 0).astype(int),
+            "is_vacances": rng.integers(0, 2, n),
+            "is_ferie": (rng.random(n) < 0.03).astype(int),
+            "is_weekend": weekend,
+        }))
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counters", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2025-12-31")
+    args = parser.parse_args()
+
+    saver.ARTIFACTS_DIR = registry.ARTIFACTS_DIR = type(saver.ARTIFACTS_DIR)(tempfile.mkdtemp(prefix="bench_xgb_"))
+    cores = os.cpu_count() or 1
+
+    rows = []
+    for n_counters in args.counters:
+        df = synthetic_training_set(n_counters, args.start, args.end)
+        for label, n_workers in (("séquentiel", 1), ("parallèle", 0)):
+            workers, n_jobs = pipeline_train.thread_budget(n_counters, n_workers)
+            start = time.perf_counter()
+            results = pipeline_train.train_counters(df, n_workers)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "compteurs": n_counters, "mode": label, "processus": workers, "n_jobs": n_jobs,
+                "secondes": round(elapsed, 1), "s/compteur": round(elapsed / max(1, len(results)), 2),
+                "MAE moyen": round(pd.DataFrame(results)["MAE"].mean(), 2),
+            })
+
+    print(f"\nCoeurs : {cores} | période {args.start} -> {args.end}")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
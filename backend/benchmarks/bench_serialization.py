@@ -0,0 +1,67 @@
+# benchmarks/bench_serialization.py
+"""
+Sérialisation d'un DataFrame counters_final en corps JSON d'insertion :
+ancienne voie (strftime par colonne, `to_dict(orient="records")`, json.dumps des dicts
+par lot, comme le client HTTP) contre src/api/utils/serialization.py (timestamps
+vectorisés, `to_json` par lot). Vérifie que les deux produisent les mêmes lignes
+(aux 15 chiffres significatifs de `to_json` près pour les flottants).
+
+Usage (depuis backend/) : python -m benchmarks.bench_serialization [--rows 500000]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.bench_final_joins import synthetic_inputs
+from src.api.routes.final_dataset.joins import build_final_frame
+from src.api.utils.bulk_writer import MAX_BATCH_BYTES, MAX_BATCH_ROWS, batch_rows_for
+from src.api.utils.schema import apply_schema, storage_safe
+from src.api.utils.serialization import encode_records, frame_batches, to_payload
+
+
+def legacy_payloads(df) -> list:
+    out = df.copy()
+    for col in out.select_dtypes(include=["datetime64[ns, UTC]", "datetime64[ns]"]).columns:
+        out[col] = out[col].dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+    records = storage_safe(out).to_dict(orient="records")
+    size = batch_rows_for(records)
+    return [json.dumps(records[i:i + size]).encode() for i in range(0, len(records), size)]
+
+
+def vectorised_payloads(df) -> list:
+    return [encode_records(batch) for batch in frame_batches(to_payload(df), MAX_BATCH_BYTES, MAX_BATCH_ROWS)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    n_counters = max(1, args.rows // (365 * 24))
+    df_velo, df_meteo, df_cal = synthetic_inputs(n_counters, 1)
+    df = build_final_frame(df_velo, df_meteo, df_cal, df_velo['timestamp'].min(), df_velo['timestamp'].max())
+    df = apply_schema(df).iloc[:args.rows]
+    df['created_at'] = datetime.now(timezone.utc)
+
+    timings = {}
+    payloads = {}
+    for label, func in (("to_dict", legacy_payloads), ("to_json", vectorised_payloads)):
+        start = time.perf_counter()
+        payloads[label] = func(df)
+        timings[label] = time.perf_counter() - start
+
+    old = pd.DataFrame([row for body in payloads["to_dict"] for row in json.loads(body)])
+    new = pd.DataFrame([row for body in payloads["to_json"] for row in json.loads(body)])
+    pd.testing.assert_frame_equal(old, new, check_exact=False, rtol=1e-12)
+
+    print(f"{len(df):,} lignes, {len(df.columns)} colonnes")
+    print(f"{'version':>10} {'temps (s)':>10} {'lignes/s':>12} {'lots':>6}")
+    for label in timings:
+        print(f"{label:>10} {timings[label]:>10.2f} {len(df) / timings[label]:>12,.0f} {len(payloads[label]):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_tuning.py
+"""
+Réglage des hyperparamètres d'un compteur, mêmes candidats (tuner.sample_candidates) :
+- recherche aléatoire : chaque candidat entraîné jusqu'à l'early stopping avec
+  trainer.train_model (matrice reconstruite à chaque fit) ;
+- tuner.select_params : successive halving sur des matrices construites une fois (1/TUNING_ETA
+  des candidats gardés par tour), gagnant retenu seulement s'il bat les paramètres par défaut.
+
+Par compteur : temps de réglage, arbres construits au total (successive halving : hors
+entraînement de référence des paramètres par défaut), MAE de validation du meilleur
+candidat, et MAE de test du modèle ré-entraîné avec ce candidat.
+
+Usage (depuis backend/) : python -m benchmarks.bench_tuning [--counters 3] [--candidates 27]
+"""
+import argparse
+import time
+
+import pandas as pd
+import xgboost as xgb
+
+from benchmarks.bench_parallel_training import synthetic_training_set
+from train_model_xgboost import evaluator, loader, trainer, tuner
+from train_model_xgboost.config import MAX_BIN, TUNING_ETA, TUNING_MIN_ROUNDS, VALIDATION_DAYS
+
+
+def random_search(X_train, y_train, X_val, y_val, candidates):
+    best, best_mae, total_trees = None, float("inf"), 0
+    for params in candidates:
+        model = trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val, params=params)
+        total_trees += model.get_booster().num_boosted_rounds()
+        mae, _ = evaluator.evaluate(y_val, model.predict(X_val).clip(0))
+        if mae < best_mae:
+            best, best_mae = params, mae
+    return best, best_mae, total_trees
+
+
+def halving_trees(n_candidates):
+    """Arbres construits par tuner.successive_halving pour `n_candidates` candidats."""
+    alive, done, budget, total = n_candidates, 0, TUNING_MIN_ROUNDS, 0
+    while True:
+        total += alive * (budget - done)
+        alive = max(1, alive // TUNING_ETA)
+        if alive == 1 or budget >= tuner.MAX_ROUNDS:
+            return total
+        done, budget = budget, min(budget * TUNING_ETA, tuner.MAX_ROUNDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counters", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2025-12-31")
+    args = parser.parse_args()
+
+    df = synthetic_training_set(args.counters, args.start, args.end)
+    candidates = tuner.sample_candidates(args.candidates)
+
+    rows = []
+    for name, positions in loader.counter_rows(df).items():
+        X_train, y_train, X_test, y_test, _, X_val, y_val = loader.get_data_for_counter(
+            df, name, positions, validation_days=VALIDATION_DAYS
+        )
+
+        def report_row(version, elapsed, trees, val_mae, params):
+            model = trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val, params=params)
+            test_mae, _ = evaluator.evaluate(y_test, model.predict(X_test).clip(0))
+            return {"version": version, "réglage (s)": elapsed, "arbres construits": trees,
+                    "MAE validation": val_mae, "MAE test": test_mae}
+
+        default = trainer.train_model(X_train, y_train, X_val=X_val, y_val=y_val)
+        rows.append(report_row("défaut", 0, 0, evaluator.evaluate(y_val, default.predict(X_val).clip(0))[0], None))
+
+        start = time.perf_counter()
+        params, val_mae, total_trees = random_search(X_train, y_train, X_val, y_val, candidates)
+        rows.append(report_row("recherche aléatoire", time.perf_counter() - start, total_trees, val_mae, params))
+
+        start = time.perf_counter()
+        dtrain = xgb.QuantileDMatrix(X_train, y_train, max_bin=MAX_BIN, enable_categorical=True)
+        dval = xgb.QuantileDMatrix(X_val, y_val, ref=dtrain, enable_categorical=True)
+        best = tuner.select_params(dtrain, dval, candidates)
+        rows.append(report_row("successive halving", time.perf_counter() - start,
+                               halving_trees(len(candidates)), best["val_mae"], best["params"]))
+
+    report = pd.DataFrame(rows).groupby("version", sort=False).mean().round(2)
+    print(f"\n{args.counters} compteurs, {args.candidates} candidats | eta {TUNING_ETA}, {TUNING_MIN_ROUNDS} arbres au 1er tour")
+    print("Moyennes par compteur :")
+    print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
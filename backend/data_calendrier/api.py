@@ -1,8 +1,7 @@
 # data_calendrier/api.py
-import requests
 import pandas as pd
 from datetime import date
-import time
+from src.api.utils.http_client import get_json
 
 class HolidayFetcher:
     def __init__(self, zone_geo: str = "metropole", zone_scolaire: str = "Zone C"):
@@ -21,13 +20,11 @@ class HolidayFetcher:
             url = f"{self.base_url_feries}/{self.zone_geo}/{year}.json"
             try:
                 print(f"   -> Fériés {year}...")
-                r = requests.get(url, timeout=10)
-                if r.status_code == 200:
-                    df = pd.DataFrame(list(r.json().items()), columns=['date', 'nom_ferie'])
-                    frames.append(df)
+                data = get_json(url, source="history", timeout=10)
+                df = pd.DataFrame(list(data.items()), columns=['date', 'nom_ferie'])
+                frames.append(df)
             except Exception:
                 pass
-            time.sleep(0.1)
 
         if not frames:
             return pd.DataFrame()
@@ -45,9 +42,7 @@ class HolidayFetcher:
             "timezone": "Europe/Paris"
         }
         try:
-            r = requests.get(self.url_vacances, params=params, timeout=20)
-            r.raise_for_status()
-            df = pd.DataFrame(r.json())
+            df = pd.DataFrame(get_json(self.url_vacances, params, source="reference", timeout=20))
             if not df.empty:
                 df = df[['description', 'start_date', 'end_date', 'zones']].copy()
                 df['start_date'] = pd.to_datetime(df['start_date'], utc=True).dt.tz_localize(None)
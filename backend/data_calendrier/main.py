@@ -1,11 +1,12 @@
 # data_calendrier/main.py
 from data_calendrier.pipeline import CalendarPipeline
+from src.api.utils.bulk_writer import WRITE_MODE
 
-def run_pipeline():
+def run_pipeline(mode: str = WRITE_MODE):
     """
     Exécute le pipeline calendrier et retourne éventuellement un résumé.
     """
-    pipe = CalendarPipeline(output_dir="data")
+    pipe = CalendarPipeline(output_dir="data", write_mode=mode)
     result = pipe.run()
     return {"status": "ok", "message": "Pipeline calendrier exécuté", "result": result}
 
@@ -4,19 +4,22 @@ import pandas as pd
 from data_calendrier.api import HolidayFetcher
 from data_calendrier.clean import ContextGenerator
 
-from data_calendrier.supabase_client import supabase
+from src.api.utils.supabase_client import get_client
+from src.api.utils.bulk_writer import WRITE_MODE, bulk_write
+from src.api.utils.serialization import format_timestamps
 
 
 class CalendarPipeline:
-    def __init__(self, output_dir: str = "data", table_name="calendar"):
+    def __init__(self, output_dir: str = "data", table_name="calendar", write_mode: str = WRITE_MODE):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         self.fetcher = HolidayFetcher(zone_scolaire="Zone C")
         self.generator = ContextGenerator()
 
-        self.supabase = supabase
+        self.supabase = get_client()
         self.table_name = table_name
+        self.write_mode = write_mode
 
     # --------------------------------------------------------
     # 3b. INSERTION DANS SUPABASE
@@ -28,34 +31,23 @@ class CalendarPipeline:
 
         print("--- 3b. Nettoyage des dates ---")
 
-        # Garantir format YYYY-MM-DD partout
-        df["date"] = pd.to_datetime(df["date"]).dt.date.astype(str)
+        # Garantir format YYYY-MM-DD partout (date et autres colonnes datetime)
+        df["date"] = pd.to_datetime(df["date"])
+        df = format_timestamps(df, unit="D")
 
-        # Convertir toutes les autres colonnes datetime
-        for col in df.select_dtypes(include=["datetime64[ns]"]).columns:
-            df[col] = df[col].dt.date.astype(str)
-
-        records = df.to_dict(orient="records")
-
-        print(f"--- 3c. Vidage de la table avant insertion ({self.table_name}) ---")
-        try:
-            # Supprimer tout contenu de la table
-            self.supabase.table(self.table_name).delete().neq("date", None).execute()
-            print(" Table nettoyée")
-        except Exception as e:
-            print(f"  Erreur purge table : {e}")
+        # En mode upsert, les jours existants sont mis à jour : pas besoin de purge
+        if self.write_mode == "insert":
+            print(f"--- 3c. Vidage de la table avant insertion ({self.table_name}) ---")
+            try:
+                # Supprimer tout contenu de la table
+                self.supabase.table(self.table_name).delete().neq("date", None).execute()
+                print(" Table nettoyée")
+            except Exception as e:
+                print(f"  Erreur purge table : {e}")
 
         print(f"--- 3d. Insertion dans Supabase ({self.table_name}) ---")
 
-        chunk_size = 2000  # performant pour des tables < 5k lignes
-
-        for i in range(0, len(records), chunk_size):
-            chunk = records[i:i + chunk_size]
-            try:
-                self.supabase.table(self.table_name).insert(chunk).execute()
-                print(f"   ✔ {len(chunk)} lignes insérées")
-            except Exception as e:
-                print(f" Erreur d'insertion : {e}")
+        bulk_write(self.table_name, df, mode=self.write_mode, client=self.supabase)
 
     # --------------------------------------------------------
     # RUN
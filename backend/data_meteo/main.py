@@ -1,9 +1,10 @@
 # data_meteo/main.py
 from data_meteo.pipeline import MeteoPipeline
+from src.api.utils.bulk_writer import WRITE_MODE
 
-def run_pipeline():
+def run_pipeline(mode: str = WRITE_MODE):
     # On définit où on veut que tout se passe (dossier data)
-    pipeline = MeteoPipeline(base_dir="data")
+    pipeline = MeteoPipeline(base_dir="data", write_mode=mode)
     
     # Lance tout le processus (Téléchargement -> Nettoyage -> Sauvegarde en DB)
     resultats = pipeline.run()
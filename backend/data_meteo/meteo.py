@@ -1,8 +1,8 @@
 # meteo/meteo.py
-import requests
 import pandas as pd
 from datetime import date, timedelta
 from pathlib import Path
+from src.api.utils.http_client import get_json
 
 # Configuration
 TIMEZONE = "Europe/Paris"
@@ -15,14 +15,13 @@ class MeteoFetcher:
         self.raw_dir = Path(raw_dir)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
 
-    def _fetch_api(self, url: str, params: dict) -> pd.DataFrame:
-        """Appel générique à l'API."""
+    def _fetch_api(self, url: str, params: dict, source: str = "history") -> pd.DataFrame:
+        """Appel générique à l'API (session partagée + cache disque)."""
         try:
-            r = requests.get(url, params=params)
-            r.raise_for_status()
-            
-            if "hourly" in r.json():
-                df = pd.DataFrame(r.json()["hourly"])
+            data = get_json(url, params, source=source)
+
+            if "hourly" in data:
+                df = pd.DataFrame(data["hourly"])
                 return df
             return pd.DataFrame()
         except Exception as e:
@@ -59,7 +58,7 @@ class MeteoFetcher:
             "hourly": "temperature_2m,precipitation,windspeed_10m",
             "forecast_days": 4, 
             "timezone": TIMEZONE
-        })
+        }, source="forecast")
 
         # Sauvegarde Brute
         self._save_raw(df_hourly_hist, "raw_hourly_history.csv")
@@ -5,11 +5,13 @@ import pandas as pd
 # Imports
 from data_meteo.cleaners import HourlyCleaner
 from data_meteo.meteo import MeteoFetcher
-from data_meteo.supabase_client import supabase 
+from src.api.utils.supabase_client import get_client
+from src.api.utils.bulk_writer import WRITE_MODE, bulk_write
 
 class MeteoPipeline:
-    def __init__(self, base_dir: str = "data"):
+    def __init__(self, base_dir: str = "data", write_mode: str = WRITE_MODE):
         self.base_dir = Path(base_dir)
+        self.write_mode = write_mode
         self.raw_dir = self.base_dir / "raw"
         self.raw_dir.mkdir(parents=True, exist_ok=True)
 
@@ -22,17 +24,8 @@ class MeteoPipeline:
             print(f"⚠️ DataFrame pour {table_name} est vide. Ignoré.")
             return
 
-        for col in df.select_dtypes(include=["datetime64[ns]", "datetime64[ns, UTC]"]).columns:
-            df[col] = df[col].apply(lambda x: x.isoformat() if pd.notnull(x) else None)
-
-        chunk_size = 500
-        for i in range(0, len(df), chunk_size):
-            chunk = df.iloc[i:i+chunk_size].to_dict(orient="records")
-            try:
-                supabase.table(table_name).insert(chunk).execute()
-                print(f"✨ {len(chunk)} lignes insérées dans {table_name}")
-            except Exception as e:
-                print(f"❌ Exception lors de l'insertion: {e}")
+        # Colonnes datetime formatées en ISO et lots encodés en JSON par bulk_write (cf. serialization)
+        bulk_write(table_name, df, mode=self.write_mode, client=get_client())
 
 
     def run(self) -> dict:
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
+from src.api.utils.supabase_client import get_client
 
 # Chargement du .env depuis la racine du projet (un niveau au-dessus)
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -11,6 +11,5 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 def get_supabase_client():
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("Erreur : SUPABASE_URL ou SUPABASE_KEY manquant dans le .env")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+    """Client partagé (Supabase, ou base SQLite locale si STORAGE_BACKEND=sqlite)."""
+    return get_client()
\ No newline at end of file
@@ -1,10 +1,10 @@
 from .config import get_supabase_client
+from src.api.utils.bulk_writer import bulk_insert
 
 def upload_forecast_data(df, target_table="counters_forecast"):
     """Envoie les données préparées vers Supabase."""
     supabase = get_supabase_client()
-    records = df.to_dict(orient="records")
-    total = len(records)
+    total = len(df)
     
     print(f"   [Load] Envoi de {total} lignes vers '{target_table}'...")
     
@@ -12,12 +12,7 @@ def upload_forecast_data(df, target_table="counters_forecast"):
     # supabase.table(target_table).delete().neq("id", 0).execute() 
     # (Attention, delete all sur supabase demande souvent une clause where)
 
-    batch_size = 100
-    for i in range(0, total, batch_size):
-        batch = records[i:i+batch_size]
-        try:
-            supabase.table(target_table).insert(batch).execute()
-        except Exception as e:
-            print(f"   ❌ Erreur sur le bloc {i}: {e}")
-            
-    print("   [Load] Chargement terminé.")
\ No newline at end of file
+    report = bulk_insert(target_table, df, client=supabase)
+
+    print("   [Load] Chargement terminé.")
+    return report
\ No newline at end of file
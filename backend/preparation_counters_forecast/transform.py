@@ -1,4 +1,5 @@
 import pandas as pd
+from src.api.utils.schema import apply_schema
 
 def build_forecast_dataset(df_counters, df_meteo, calendar_info, target_date):
     """Assemble les données pour créer les 240 lignes de prédiction."""
@@ -61,4 +62,4 @@ def build_forecast_dataset(df_counters, df_meteo, calendar_info, target_date):
             }
             final_rows.append(row)
             
-    return pd.DataFrame(final_rows)
\ No newline at end of file
+    return apply_schema(pd.DataFrame(final_rows), label="counters_forecast")
\ No newline at end of file
@@ -0,0 +1,14 @@
+-- sql/counters_daily.sql
+-- Agrégat journalier des compteurs bruts, tenu à jour par
+-- src/api/utils/daily_rollup.py (upsert sur (name, date)).
+-- Sert au classement de fiabilité de /process_top10.
+
+CREATE TABLE IF NOT EXISTS counters_daily (
+    id           BIGSERIAL PRIMARY KEY,
+    name         TEXT    NOT NULL,
+    date         DATE    NOT NULL,
+    daily_sum    INTEGER NOT NULL,
+    is_zero_day  BOOLEAN NOT NULL,
+    active_hours SMALLINT NOT NULL,
+    CONSTRAINT counters_daily_name_date_key UNIQUE (name, date)
+);
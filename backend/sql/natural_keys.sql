@@ -0,0 +1,32 @@
+-- sql/natural_keys.sql
+-- Contraintes d'unicité sur les clés naturelles, nécessaires à l'upsert
+-- (ON CONFLICT) de src/api/utils/bulk_writer.py. À exécuter une fois dans
+-- l'éditeur SQL Supabase : supprime d'abord les doublons laissés par les
+-- anciennes relances en insert.
+
+-- counters / counters_clean / counters_final : (name, timestamp)
+DELETE FROM counters a USING counters b
+WHERE a.ctid < b.ctid AND a.name = b.name AND a."timestamp" = b."timestamp";
+ALTER TABLE counters ADD CONSTRAINT counters_name_timestamp_key UNIQUE (name, "timestamp");
+
+DELETE FROM counters_clean a USING counters_clean b
+WHERE a.ctid < b.ctid AND a.name = b.name AND a."timestamp" = b."timestamp";
+ALTER TABLE counters_clean ADD CONSTRAINT counters_clean_name_timestamp_key UNIQUE (name, "timestamp");
+
+DELETE FROM counters_final a USING counters_final b
+WHERE a.ctid < b.ctid AND a.name = b.name AND a."timestamp" = b."timestamp";
+ALTER TABLE counters_final ADD CONSTRAINT counters_final_name_timestamp_key UNIQUE (name, "timestamp");
+
+-- meteo_history / meteo_forecast : time
+DELETE FROM meteo_history a USING meteo_history b
+WHERE a.ctid < b.ctid AND a."time" = b."time";
+ALTER TABLE meteo_history ADD CONSTRAINT meteo_history_time_key UNIQUE ("time");
+
+DELETE FROM meteo_forecast a USING meteo_forecast b
+WHERE a.ctid < b.ctid AND a."time" = b."time";
+ALTER TABLE meteo_forecast ADD CONSTRAINT meteo_forecast_time_key UNIQUE ("time");
+
+-- calendar : date
+DELETE FROM calendar a USING calendar b
+WHERE a.ctid < b.ctid AND a.date = b.date;
+ALTER TABLE calendar ADD CONSTRAINT calendar_date_key UNIQUE (date);
@@ -1,7 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from src.api.utils.io_utils import load_and_pivot_local_csv
 from src.api.utils.fetch_ecocounter import fetch_api_counters_list
-from src.api.utils.upload_counters import download_and_merge_timeseries, upload_to_supabase
+from src.api.utils.upload_counters import (
+    DATE_DEBUT_HISTORIQUE, download_and_merge_timeseries, incremental_periods,
+    stream_to_supabase, upload_to_supabase, yearly_periods,
+)
+from src.api.utils.bulk_writer import WRITE_MODE
+from src.api.utils.daily_rollup import try_update_daily_rollup
 from src.api.config import PATH_GEO_CSV
 import pandas as pd
 
@@ -15,7 +20,11 @@ last_month_end = (today.replace(day=1) - pd.Timedelta(days=1)).replace(hour=23,
 DATE_FIN_CIBLE = last_month_end.strftime("%Y-%m-%dT%H:%M:%S")
 
 @router.post("/archive")
-def update_data():
+def update_data(
+    mode: str = Query(WRITE_MODE, pattern="^(insert|upsert)$", description="insert | upsert (idempotent)"),
+    full_refresh: bool = Query(False, description="Re-télécharge tout l'historique au lieu des seules heures manquantes"),
+    streaming: bool = Query(True, description="Écrit chaque compteur dès son téléchargement (mémoire bornée)"),
+):
     df_geo = load_and_pivot_local_csv(PATH_GEO_CSV)
     df_api = fetch_api_counters_list()
     
@@ -24,13 +33,21 @@ def update_data():
 
     df_merged = df_geo.merge(df_api, on="serial_number", how="inner")
 
-    periods = [
-        ("2023-01-01T00:00:00", "2023-12-31T23:59:59"),
-        ("2024-01-01T00:00:00", "2024-12-31T23:59:59"),
-        ("2025-01-01T00:00:00", DATE_FIN_CIBLE)
-    ]
+    # Par défaut : uniquement les heures postérieures au dernier relevé stocké de chaque compteur
+    if full_refresh:
+        periods = yearly_periods(DATE_DEBUT_HISTORIQUE, DATE_FIN_CIBLE)
+    else:
+        periods = incremental_periods(df_merged, DATE_FIN_CIBLE)
 
-    df_final = download_and_merge_timeseries(df_merged, periods)
-    rows_uploaded = upload_to_supabase(df_final)
+    if streaming:
+        rows_uploaded = stream_to_supabase(df_merged, periods, mode=mode)
+    else:
+        df_final = download_and_merge_timeseries(df_merged, periods)
+        rows_uploaded = upload_to_supabase(df_final, mode=mode)
 
-    return {"status": "success", "rows_uploaded": rows_uploaded}
+    # Agrégat journalier (classement /process_top10) : seuls les jours touchés sont recalculés.
+    # Les relevés sont déjà écrits : un échec de l'agrégat est signalé sans faire échouer la requête.
+    rows_rollup, rollup_error = try_update_daily_rollup()
+
+    return {"status": "success", "full_refresh": full_refresh, "rows_uploaded": rows_uploaded,
+            "rows_rollup": rows_rollup, "rollup_error": rollup_error}
@@ -1,45 +1,29 @@
-from fastapi import APIRouter, HTTPException
-from src.api.utils.supabase_client import supabase
+from fastapi import APIRouter, HTTPException, Query
+from src.api.utils.supabase_client import get_client
 import pandas as pd
-from tqdm import tqdm
+from src.api.utils.bulk_writer import WRITE_MODE, bulk_write
+from src.api.utils.daily_rollup import rank_counters, try_update_daily_rollup
+from src.api.utils.dense_grid import dense_clean_grid, until_last_reading
+from src.api.utils.counters_clean_utils import clean_read_plan
+from src.api.utils.supabase_reader import fetch_table, fetch_table_parallel
 
 router = APIRouter()
 
 @router.post("/process_top10")
-def process_top10():
+def process_top10(
+    mode: str = Query(WRITE_MODE, pattern="^(insert|upsert)$", description="insert | upsert (idempotent)"),
+    top_n: int = Query(10, ge=1, description="Nombre de compteurs retenus"),
+    window_days: int | None = Query(None, ge=1, description="Historique pris en compte pour la fiabilité (jours, défaut : tout)"),
+    full_refresh: bool = Query(False, description="Reconstruit toute la grille au lieu des seules nouvelles heures"),
+):
     try:
-        print("\n=== 1️⃣ DOWNLOAD FROM SUPABASE: counters ===")
+        supabase = get_client()
+        print("\n=== 1️⃣ UPDATE DAILY ROLLUP: counters_daily ===")
+        # Sans counters_daily, le classement est recalculé depuis counters (cf. rank_counters)
+        rows_rollup, rollup_error = try_update_daily_rollup(client=supabase)
+        print(f"Daily rows upserted: {rows_rollup}")
 
-        all_rows = []
-        page_size = 10000
-        last_timestamp = None  # for keyset-pagination
-
-        while True:
-            query = supabase.table("counters").select("*").order("timestamp")
-            if last_timestamp:
-                query = query.gt("timestamp", last_timestamp)
-
-            resp = query.limit(page_size).execute()
-            batch = resp.data
-
-            if not batch:
-                break
-
-            all_rows.extend(batch)
-            last_timestamp = batch[-1]["timestamp"]  # last timestamp
-
-        print(f"Rows downloaded: {len(all_rows)}")
-        if not all_rows:
-            raise HTTPException(status_code=404, detail="La table counters est vide")
-
-        print("\n=== 2️⃣ CREATE DATAFRAME ===")
-        df = pd.DataFrame(all_rows)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
-
-        print("Timestamp MIN:", df['timestamp'].min())
-        print("Timestamp MAX:", df['timestamp'].max())
-
-        print("\n=== 3️⃣ COMPUTE LAST MONTH ===")
+        print("\n=== 2️⃣ COMPUTE LAST MONTH ===")
         today = pd.Timestamp.now('UTC')
         last_month = (today - pd.DateOffset(months=1)).to_period('M')
         debut_mois_precedent = last_month.start_time.tz_localize('UTC')
@@ -48,85 +32,73 @@ def process_top10():
         print("Last month start:", debut_mois_precedent)
         print("Last month end  :", fin_mois_precedent)
 
-        mask_periode = (df['timestamp'] >= debut_mois_precedent) & (df['timestamp'] <= fin_mois_precedent)
-        compteurs_actifs = df[mask_periode & (df['intensity'] > 0)]['name'].unique()
-
-        print(f"Active counters in that month: {len(compteurs_actifs)}")
-        print("Counters list:", compteurs_actifs.tolist())
+        print("\n=== 3️⃣ HISTORICAL RELIABILITY (counters_daily) ===")
+        # Seuls les compteurs actifs le mois dernier sont classés
+        ranking = rank_counters(
+            top_n=top_n, window_days=window_days,
+            active_start=debut_mois_precedent, active_end=fin_mois_precedent,
+            client=supabase,
+        )
+        print(ranking)
 
-        if len(compteurs_actifs) == 0:
+        if ranking.empty:
             raise HTTPException(status_code=404, detail="Aucun compteur Top 10 trouvé")
 
-        print("\n=== 4️⃣ HISTORICAL RELIABILITY ===")
-        df['date'] = df['timestamp'].dt.date
-        matrix = df.groupby(['name', 'date'])['intensity'].sum().unstack().fillna(0)
-
-        print("Matrix shape:", matrix.shape)
-        print("Matrix sample columns (dates):", list(matrix.columns)[:5], "...")
-
-        jours_hs = (matrix == 0).sum(axis=1).reset_index()
-        jours_hs.columns = ['name', 'nb_hs']
-        jours_hs['taux_panne'] = (jours_hs['nb_hs'] / len(matrix.columns) * 100)
-        df_selection = jours_hs[jours_hs['name'].isin(compteurs_actifs)]
-        top_10_names = df_selection.sort_values(by='taux_panne', ascending=True).head(10)['name'].tolist()
-
+        top_10_names = ranking['name'].tolist()
         print("Top10:", top_10_names)
 
-        print("\n=== 5️⃣ CREATE FULL HOURLY GRID ===")
-        df_top = df[df['name'].isin(top_10_names)].copy()
-        meta_coords = df_top[['name', 'latitude', 'longitude']].drop_duplicates(subset=['name'])
-
-        full_time_range = pd.date_range(
-            start=df['timestamp'].min(),
-            end=df['timestamp'].max(),
-            freq='h',
-            name='timestamp'
-        )
+        print("\n=== 4️⃣ DOWNLOAD FROM SUPABASE: counters (top only) ===")
+        raw_columns = ["intensity", "latitude", "longitude"]
+        if full_refresh:
+            write_after = {}
+            df = fetch_table(
+                "counters", columns=raw_columns,
+                filters=[("in_", "name", top_10_names)], parse_dates=["timestamp"], client=supabase,
+            )
+        else:
+            # Relevés bruts à partir du dernier relevé <= dernière heure déjà nettoyée
+            partitions, write_after = clean_read_plan(top_10_names, mode=mode, client=supabase)
+            df = fetch_table_parallel(
+                "counters", partitions, columns=raw_columns, parse_dates=["timestamp"], client=supabase,
+            )
+        print(f"Rows downloaded: {len(df)} (incremental counters: {len(write_after)})")
+        if df.empty:
+            raise HTTPException(status_code=404, detail="La table counters est vide")
 
-        print("full_time_range start:", full_time_range.min())
-        print("full_time_range end  :", full_time_range.max())
-        print("Len full_time_range:", len(full_time_range))
+        print("\n=== 5️⃣ CREATE FULL HOURLY GRID ===")
+        meta_coords = df[['name', 'latitude', 'longitude']]
 
-        df_dates = pd.DataFrame(full_time_range)
-        df_names = pd.DataFrame({'name': top_10_names})
-        df_grid = df_names.merge(df_dates, how='cross')
+        print("full_time_range start:", df['timestamp'].min())
+        print("full_time_range end  :", df['timestamp'].max())
 
-        print("df_grid rows:", len(df_grid))
+        # Grille dense compteurs × heures + interpolation linéaire vectorisée (cf. dense_grid)
+        print("\n=== 6️⃣ INTERPOLATION ===")
+        df_final = dense_clean_grid(df, top_10_names, meta_coords, df['timestamp'].min(), df['timestamp'].max())
+        # Rien d'extrapolé n'est écrit : chaque compteur s'arrête à son dernier relevé brut
+        df_final = until_last_reading(df_final, df)
 
-        df_final = df_grid.merge(
-            df_top[['timestamp', 'name', 'intensity']],
-            on=['timestamp', 'name'],
-            how='left'
-        ).merge(meta_coords, on='name', how='left')
+        print("df_grid rows:", len(df_final))
 
-        print("df_final rows after merge:", len(df_final))
+        # Incrémental : uniquement les heures postérieures au point de reprise de chaque compteur
+        if write_after:
+            cutoff = df_final['name'].map(write_after).fillna("")
+            df_final = df_final[df_final['timestamp'] > cutoff]
+            print("New rows after watermark:", len(df_final))
         print(df_final.head())
 
-        print("\n=== 6️⃣ INTERPOLATION ===")
-        df_final = df_final.sort_values(['name', 'timestamp'])
-        df_final['intensity'] = df_final.groupby('name')['intensity'].transform(
-            lambda g: g.interpolate(method='linear', limit_direction='both')
-        )
-        df_final['intensity'] = df_final['intensity'].fillna(0).round().astype(int)
-
-        print("Missing intensities after interpolate:", df_final['intensity'].isna().sum())
-
         print("\n=== 7️⃣ UPLOAD TO SUPABASE ===")
-        df_final_to_insert = df_final.copy()
-        df_final_to_insert['timestamp'] = df_final_to_insert['timestamp'].apply(lambda x: x.isoformat())
-        records = df_final_to_insert.to_dict(orient='records')
-
-        print("Total rows to upload:", len(records))
+        print("Total rows to upload:", len(df_final))
 
-        for i in tqdm(range(0, len(records), 500), desc="Uploading batches"):
-            batch = records[i:i+500]
-            supabase.table("counters_clean").insert(batch).execute()
+        report = bulk_write("counters_clean", df_final, mode=mode)
 
         print("UPLOAD FINISHED ✔")
 
         return {
             "status": "success",
-            "rows_uploaded": len(records),
+            "full_refresh": full_refresh,
+            "rows_uploaded": report.rows_written,
+            "rows_failed": report.rows_failed,
+            "rollup_error": rollup_error,
             "top10_names": top_10_names,
             "period_start": debut_mois_precedent.strftime("%Y-%m-%d"),
             "period_end": fin_mois_precedent.strftime("%Y-%m-%d")
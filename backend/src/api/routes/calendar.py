@@ -1,12 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from data_calendrier.main import run_pipeline
+from src.api.utils.bulk_writer import WRITE_MODE
 
 router = APIRouter()
 
 @router.post("/run-calendar")
-def run_calendar_route():
+def run_calendar_route(mode: str = Query(WRITE_MODE, pattern="^(insert|upsert)$", description="insert | upsert (idempotent)")):
     try:
-        result = run_pipeline()
+        result = run_pipeline(mode=mode)
         return {"status": "ok", "result": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Query
 from datetime import datetime, timedelta
-from src.api.utils.supabase_client import supabase
+from src.api.utils.supabase_client import get_client
+from src.api.utils.bulk_writer import bulk_insert
 from src.api.routes.prediction_final.predict_hourly import run_prediction_pipeline
 
 router = APIRouter()
@@ -29,15 +30,14 @@ async def predict_hourly(date: str | None = Query(
 
     # 2. Clear table
     try:
-        supabase.table("predictions_hourly").delete().neq("id", -1).execute()
+        get_client().table("predictions_hourly").delete().neq("id", -1).execute()
     except Exception as e:
         return {"status": "error", "message": f"Failed to clear predictions_hourly: {e}"}
 
     # 3. Insert new predictions
-    try:
-        supabase.table("predictions_hourly").insert(predictions_list).execute()
-    except Exception as e:
-        return {"status": "error", "message": f"Failed to insert predictions: {e}"}
+    report = bulk_insert("predictions_hourly", predictions_list)
+    if report.rows_failed:
+        return {"status": "error", "message": f"Failed to insert predictions: {report.errors[0]}"}
 
     return {
         "status": "ok",
@@ -1,31 +1,21 @@
+import numpy as np
 import pandas as pd
 import joblib
-from train_model_xgboost import config, loader
-from src.api.utils.supabase_client import supabase
+from train_model_xgboost import config, loader, registry, saver
+from src.api.utils.supabase_client import get_client
+from src.api.utils.supabase_reader import fetch_table
+from src.api.utils.bulk_writer import bulk_insert
+from src.api.utils.schema import apply_schema
 
 INPUT_TABLE = "counters_forecast"
 OUTPUT_TABLE = "predictions_hourly"
 
-
-# -------------------------
-# Fetch all rows with pagination
-# -------------------------
-def fetch_all(table_name: str) -> pd.DataFrame:
-    all_rows = []
-    offset = 0
-    limit = 1000
-
-    while True:
-        resp = supabase.table(table_name).select("*").range(offset, offset + limit - 1).execute()
-        rows = resp.data
-
-        if not rows:
-            break
-
-        all_rows.extend(rows)
-        offset += limit
-
-    return pd.DataFrame(all_rows)
+# Columns read from counters_forecast (time features are recomputed below)
+INPUT_COLUMNS = [
+    'name', 'timestamp', 'latitude', 'longitude',
+    'temperature_2m', 'precipitation', 'precipitation_class', 'windspeed_10m', 'is_raining',
+    'is_vacances', 'is_ferie', 'is_weekend'
+]
 
 
 # -------------------------
@@ -34,12 +24,13 @@ def fetch_all(table_name: str) -> pd.DataFrame:
 def overwrite_table(table_name: str, data: list):
     """
     Completely clears a Supabase table and inserts new data.
+    Rows are sent as a DataFrame so they go through the vectorised JSON encoder.
     """
 
     print(f"[INFO] Clearing table '{table_name}'...")
 
     try:
-        supabase.table(table_name).delete().neq("id", 0).execute()
+        get_client().table(table_name).delete().neq("id", 0).execute()
         print(f"[INFO] Table '{table_name}' cleared.")
     except Exception as e:
         print(f"[ERROR] Failed to clear table '{table_name}': {e}")
@@ -51,27 +42,111 @@ def overwrite_table(table_name: str, data: list):
 
     print(f"[INFO] Inserting {len(data)} new rows...")
 
-    try:
-        batch_size = 100
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            supabase.table(table_name).insert(batch).execute()
-            print(f"   -> Batch {i}-{i + len(batch)} inserted")
-    except Exception as e:
-        print(f"[ERROR] Failed to insert new rows: {e}")
+    report = bulk_insert(table_name, pd.DataFrame(data))
+    if report.rows_failed:
+        print(f"[ERROR] Failed to insert {report.rows_failed} rows.")
         return
 
     print(f"[SUCCESS] Table '{table_name}' overwritten successfully.")
 
 
+# -------------------------
+# Model inference
+# -------------------------
+def model_predictor(name: str, manifest: dict | None, boosters: dict, features: list):
+    """
+    Prediction function for a model: booster of the current registry run when it has one,
+    otherwise the legacy joblib file (`features` selected); None if neither exists.
+    """
+    if name in boosters:
+        entry = manifest["models"][name]
+        return lambda df: registry.predict(boosters[name], entry, df)
+
+    legacy_path = saver.model_path(name)
+    if not legacy_path.exists():
+        return None
+    model = joblib.load(legacy_path)
+    return lambda df: model.predict(df[features])
+
+
+def predict_per_counter(df_day: pd.DataFrame, target_date_str: str, manifest: dict | None = None,
+                        boosters: dict | None = None):
+    """One model per counter: call each counter's model (cf. `model_predictor`)."""
+    predictions_list = []
+    counters = df_day['name'].unique()
+    boosters = boosters or {}
+
+    # Predict for each counter
+    for name in counters:
+        df_c = df_day[df_day['name'] == name].copy()
+
+        lat = df_c['latitude'].iloc[0]
+        lon = df_c['longitude'].iloc[0]
+
+        predict = model_predictor(name, manifest, boosters, loader.FEATURES_XGBOOST)
+
+        if predict is None:
+            print(f"[WARNING] Model missing for: {name}")
+            continue
+
+        try:
+            preds = predict(df_c)
+            y_pred = [int(max(0, p)) for p in preds]
+
+            for i, val in enumerate(y_pred):
+                predictions_list.append({
+                    "name": name,
+                    "date": target_date_str,
+                    "hour": int(df_c['hour'].iloc[i]),
+                    "predicted_intensity": val,
+                    "latitude": lat,
+                    "longitude": lon
+                })
+        except KeyError as e:
+            print(f"[ERROR] Missing column for {name}: {e}")
+            print("Available:", df_c.columns.tolist())
+            return None
+
+    return predictions_list
+
+
+def predict_global(df_day: pd.DataFrame, predict, target_date_str: str):
+    """Global model: the whole network in a single predict call (`predict`: cf. `model_predictor`)."""
+    try:
+        # XGBoost re-codes the 'name' categories against those seen during training
+        preds = predict(df_day)
+    except KeyError as e:
+        print(f"[ERROR] Missing column for global model: {e}")
+        print("Available:", df_day.columns.tolist())
+        return None
+
+    df_pred = pd.DataFrame({
+        "name": df_day['name'].astype(str).to_numpy(),
+        "date": target_date_str,
+        "hour": df_day['hour'].astype(int).to_numpy(),
+        "predicted_intensity": np.maximum(preds, 0).astype(int),
+        "latitude": df_day['latitude'].to_numpy(),
+        "longitude": df_day['longitude'].to_numpy(),
+    })
+    return df_pred.to_dict(orient="records")
+
+
 # -------------------------
 # Main prediction function
 # -------------------------
 def run_prediction_pipeline(target_date: str = None):
     print(f"🚀 Starting prediction from '{INPUT_TABLE}'...")
 
-    # Load data
-    df_day = fetch_all(INPUT_TABLE)
+    # Load data (only the target day when it is known)
+    filters = None
+    if target_date:
+        day_start = pd.Timestamp(target_date).normalize()
+        day_end = day_start + pd.Timedelta(days=1)
+        filters = [
+            ("gte", "timestamp", day_start.strftime("%Y-%m-%dT%H:%M:%S")),
+            ("lt", "timestamp", day_end.strftime("%Y-%m-%dT%H:%M:%S")),
+        ]
+    df_day = fetch_table(INPUT_TABLE, columns=INPUT_COLUMNS, filters=filters)
 
     if df_day.empty:
         print(f"⚠️ Table {INPUT_TABLE} is empty.")
@@ -103,46 +178,21 @@ def run_prediction_pipeline(target_date: str = None):
     df_day['month'] = df_day['timestamp'].dt.month
     df_day['year'] = df_day['timestamp'].dt.year
     df_day['dayofweek'] = df_day['timestamp'].dt.dayofweek
+    apply_schema(df_day, label=INPUT_TABLE)
 
-    predictions_list = []
-    counters = df_day['name'].unique()
-
-    print(f"🤖 Loading models from: {config.ARTIFACTS_DIR}")
-
-    # Predict for each counter
-    for name in counters:
-        df_c = df_day[df_day['name'] == name].copy()
-
-        lat = df_c['latitude'].iloc[0]
-        lon = df_c['longitude'].iloc[0]
+    # Current registry run in one call (legacy joblib files as fallback)
+    manifest, boosters = registry.load_current()
+    run_label = f"run {manifest['run_id']}" if manifest else "legacy joblib files"
+    print(f"🤖 Loading models from: {config.ARTIFACTS_DIR} ({run_label})")
 
-        safe_name = name.replace(" ", "_").replace("/", "-")
-        model_path = config.ARTIFACTS_DIR / f"xgboost_{safe_name}.joblib"
+    global_predict = None
+    if config.MODEL_MODE == "global":
+        global_predict = model_predictor(config.GLOBAL_MODEL_NAME, manifest, boosters, loader.FEATURES_GLOBAL)
 
-        if not model_path.exists():
-            print(f"[WARNING] Model missing for: {name}")
-            continue
-
-        model = joblib.load(model_path)
-
-        try:
-            X = df_c[loader.FEATURES_XGBOOST]
-            preds = model.predict(X)
-            y_pred = [int(max(0, p)) for p in preds]
-
-            for i, val in enumerate(y_pred):
-                predictions_list.append({
-                    "name": name,
-                    "date": target_date_str,
-                    "hour": int(df_c['hour'].iloc[i]),
-                    "predicted_intensity": val,
-                    "latitude": lat,
-                    "longitude": lon
-                })
-        except KeyError as e:
-            print(f"[ERROR] Missing column for {name}: {e}")
-            print("Available:", df_c.columns.tolist())
-            return
+    if global_predict is not None:
+        predictions_list = predict_global(df_day, global_predict, target_date_str)
+    else:
+        predictions_list = predict_per_counter(df_day, target_date_str, manifest, boosters)
 
     if not predictions_list:
         print("❌ No predictions generated.")
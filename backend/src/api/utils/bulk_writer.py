@@ -0,0 +1,219 @@
+# src/api/utils/bulk_writer.py
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+from src.api.utils.serialization import encode_records, frame_batches, to_payload
+from src.api.utils.supabase_client import get_client
+
+# Taille cible d'une requête d'insertion (JSON) et bornes du nombre de lignes par lot
+MAX_BATCH_BYTES = int(os.getenv("SUPABASE_WRITE_BATCH_BYTES", "1000000"))
+MAX_BATCH_ROWS = 5000
+
+# Requêtes d'insertion simultanées
+WRITE_WORKERS = int(os.getenv("SUPABASE_WRITE_WORKERS", "4"))
+
+# Nouvelles tentatives par lot : attente BACKOFF_SECONDS * 2^n (+ jitter)
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+
+# "insert" (défaut) : ajout simple ; "upsert" : une relance ne duplique pas les lignes,
+# mais exige les contraintes UNIQUE de sql/natural_keys.sql (cf. README)
+WRITE_MODE = os.getenv("SUPABASE_WRITE_MODE", "insert")
+
+# Erreur PostgreSQL 42P10 : upsert sans contrainte UNIQUE sur la clé (migration non appliquée)
+MISSING_CONSTRAINT_ERRORS = ("42P10", "no unique or exclusion constraint matching the ON CONFLICT")
+
+# Clés naturelles des tables (contraintes UNIQUE, cf. sql/natural_keys.sql)
+NATURAL_KEYS = {
+    "counters": ("name", "timestamp"),
+    "counters_clean": ("name", "timestamp"),
+    "counters_final": ("name", "timestamp"),
+    "counters_daily": ("name", "date"),
+    "meteo_history": ("time",),
+    "meteo_forecast": ("time",),
+    "calendar": ("date",),
+}
+
+
+@dataclass
+class WriteReport:
+    """Bilan d'une écriture en masse."""
+    table: str
+    rows_written: int = 0
+    rows_retried: int = 0
+    rows_failed: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def merge(self, other: "WriteReport") -> "WriteReport":
+        """Cumule le bilan d'une autre écriture (même table, ex. écriture par morceaux)."""
+        self.rows_written += other.rows_written
+        self.rows_retried += other.rows_retried
+        self.rows_failed += other.rows_failed
+        self.batches += other.batches
+        self.seconds = round(self.seconds + other.seconds, 3)
+        self.errors.extend(other.errors)
+        return self
+
+    def __str__(self) -> str:
+        return (f"{self.table} : {self.rows_written} écrites, {self.rows_retried} réessayées, "
+                f"{self.rows_failed} en échec ({self.batches} lots, {self.seconds:.1f}s)")
+
+
+def batch_rows_for(records: list, max_bytes: int = MAX_BATCH_BYTES, max_rows: int = MAX_BATCH_ROWS) -> int:
+    """Nombre de lignes par lot pour rester sous `max_bytes`, estimé sur un échantillon."""
+    step = max(1, len(records) // 200)
+    sample = records[::step][:200]
+    avg_bytes = sum(len(json.dumps(r, default=str)) + 1 for r in sample) / len(sample)
+    return int(max(1, min(max_rows, max_bytes // avg_bytes)))
+
+
+def dedupe_records(records: list, keys) -> list:
+    """Garde la dernière occurrence de chaque clé naturelle (ordre de première apparition)."""
+    unique = {}
+    for record in records:
+        unique[tuple(record.get(k) for k in keys)] = record
+    return list(unique.values())
+
+
+def _send(client, table_name: str, payload, on_conflict: str = None):
+    """
+    Envoie un lot : liste de dicts, ou corps JSON déjà encodé (bytes).
+    postgrest-py ré-encode toujours son argument `json` : les bytes sont donc envoyés tels
+    quels sur la session HTTP du client, avec les en-têtes et paramètres qu'il a préparés.
+    """
+    query = client.table(table_name)
+    if on_conflict:
+        query = query.upsert(payload, on_conflict=on_conflict, returning="minimal")
+    else:
+        query = query.insert(payload, returning="minimal")
+
+    request = getattr(query, "request", None)
+    if isinstance(payload, bytes) and request is not None:
+        response = request.session.request(
+            request.http_method, str(request.path), content=payload,
+            params=request.params, headers=request.headers, auth=request.auth,
+        )
+        if not response.is_success:
+            raise RuntimeError(f"HTTP {response.status_code} : {response.text[:300]}")
+    else:
+        query.execute()
+
+
+def _is_missing_constraint(error) -> bool:
+    return any(marker in str(error) for marker in MISSING_CONSTRAINT_ERRORS)
+
+
+def _write_batch(client, table_name: str, batch, on_conflict: str = None):
+    """
+    Envoie un lot avec backoff exponentiel. Retourne (succès, réessayé, erreur).
+    Une contrainte UNIQUE manquante n'est pas réessayée (l'erreur est définitive).
+    """
+    retried = False
+    payload = encode_records(batch) if isinstance(batch, pd.DataFrame) else batch
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            _send(client, table_name, payload, on_conflict)
+            return True, retried, None
+        except Exception as e:
+            if attempt == MAX_RETRIES or _is_missing_constraint(e):
+                return False, retried, str(e)
+            retried = True
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt * (1 + random.random()))
+
+
+def bulk_write(table_name: str, records, mode: str = "insert", keys=None, client=None,
+               max_workers: int = None, max_batch_bytes: int = MAX_BATCH_BYTES) -> WriteReport:
+    """
+    Écrit `records` (liste de dicts ou DataFrame) dans `table_name` :
+    lots dimensionnés d'après la taille JSON, envoyés en parallèle sur un pool borné,
+    avec nouvelles tentatives. Les lots définitivement en échec sont comptés dans le bilan.
+
+    En mode "upsert", les lignes sont dédoublonnées en mémoire sur la clé naturelle
+    (`keys`, sinon NATURAL_KEYS) puis fusionnées côté serveur (ON CONFLICT ... DO UPDATE).
+
+    Un DataFrame est sérialisé sans passer par des dicts Python (cf. serialization) :
+    timestamps formatés par colonne, lots encodés directement en JSON au moment de l'envoi.
+    """
+    if mode not in ("insert", "upsert"):
+        raise ValueError(f"Mode d'écriture inconnu : {mode}")
+    client = client or get_client()
+    is_frame = isinstance(records, pd.DataFrame)
+    if is_frame:
+        records = to_payload(records)
+
+    report = WriteReport(table=table_name)
+    if len(records) == 0:
+        return report
+
+    on_conflict = None
+    if mode == "upsert":
+        keys = keys or NATURAL_KEYS[table_name]
+        on_conflict = ",".join(keys)
+        n_before = len(records)
+        if is_frame:
+            records = records.drop_duplicates(subset=list(keys), keep="last")
+        else:
+            records = dedupe_records(records, keys)
+        if len(records) < n_before:
+            print(f"   🧹 {n_before - len(records)} doublons retirés avant l'upsert ({table_name})")
+
+    if is_frame:
+        batches = frame_batches(records, max_batch_bytes, MAX_BATCH_ROWS)
+    else:
+        rows_per_batch = batch_rows_for(records, max_batch_bytes)
+        batches = [records[i:i + rows_per_batch] for i in range(0, len(records), rows_per_batch)]
+    report.batches = len(batches)
+
+    def account(batch, ok, retried, error):
+        if retried:
+            report.rows_retried += len(batch)
+        if ok:
+            report.rows_written += len(batch)
+        else:
+            report.rows_failed += len(batch)
+            report.errors.append(error)
+
+    start = time.perf_counter()
+    if on_conflict:
+        # Premier lot seul : sans sql/natural_keys.sql, PostgreSQL refuse tous les lots
+        ok, retried, error = _write_batch(client, table_name, batches[0], on_conflict)
+        if not ok and _is_missing_constraint(error):
+            raise RuntimeError(
+                f"Upsert impossible sur '{table_name}' : pas de contrainte UNIQUE sur ({on_conflict}). "
+                f"Exécuter sql/natural_keys.sql dans l'éditeur SQL Supabase, ou écrire en mode insert. ({error})"
+            )
+        account(batches[0], ok, retried, error)
+        batches = batches[1:]
+
+    with ThreadPoolExecutor(max_workers=max_workers or WRITE_WORKERS) as pool:
+        futures = {pool.submit(_write_batch, client, table_name, batch, on_conflict): batch for batch in batches}
+        for future in as_completed(futures):
+            account(futures[future], *future.result())
+    report.seconds = round(time.perf_counter() - start, 3)
+
+    status = "✅" if not report.rows_failed else "⚠️"
+    print(f"   {status} {report}")
+    for error in report.errors[:3]:
+        print(f"      ❌ {error}")
+    return report
+
+
+def bulk_insert(table_name: str, records, **kwargs) -> WriteReport:
+    """Insertion simple (cf. `bulk_write`)."""
+    return bulk_write(table_name, records, mode="insert", **kwargs)
+
+
+def bulk_upsert(table_name: str, records, keys=None, **kwargs) -> WriteReport:
+    """Upsert idempotent sur la clé naturelle de la table (cf. `bulk_write`)."""
+    return bulk_write(table_name, records, mode="upsert", keys=keys, **kwargs)
@@ -1,11 +1,13 @@
-from src.api.utils.supabase_client import supabase
+from src.api.utils.supabase_client import get_client
+from src.api.utils.bulk_writer import bulk_upsert
+from src.api.utils.supabase_reader import latest_by_name
 import pandas as pd
 
 # ------------------------------
 # Chargement de tous les compteurs à partir du tableau counters
 # ------------------------------
 def load_counters_from_db():
-    response = supabase.table("counters").select("*").execute()
+    response = get_client().table("counters").select("*").execute()
     df = pd.DataFrame(response.data)
     if not df.empty:
         df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
@@ -14,7 +16,7 @@ def load_counters_from_db():
 # ------------------------------
 # Chargement du jeu de données nettoyé dans counters_clean
 # ------------------------------
-def upload_counters_clean(df_final, batch_size=500):
+def upload_counters_clean(df_final):
     # pour une intégration future
     if 'day_of_week' not in df_final.columns:
         df_final['day_of_week'] = df_final['timestamp'].dt.dayofweek
@@ -23,8 +25,45 @@ def upload_counters_clean(df_final, batch_size=500):
     if 'calendar_data' not in df_final.columns:
         df_final['calendar_data'] = None
 
-    records = df_final.to_dict(orient="records")
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i+batch_size]
-        supabase.table("counters_clean").upsert(batch).execute()
-    print(f"✅ Uploaded {len(records)} strings in counters_clean")
+    report = bulk_upsert("counters_clean", df_final)
+    print(f"✅ Uploaded {report.rows_written} strings in counters_clean")
+
+# ------------------------------
+# Reconstruction incrémentale de counters_clean
+# ------------------------------
+def _iso_utc(value):
+    """Timestamp ISO UTC au format des lignes de dense_grid (comparable en chaîne)."""
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def clean_read_plan(names, mode="upsert", client=None):
+    """
+    Pour chaque compteur : partition de lecture des relevés bruts et heure après laquelle
+    la grille nettoyée doit être écrite.
+
+    - Dernière heure propre W (watermark de counters_clean) et dernier relevé brut A <= W
+      (ancre) : on relit counters à partir de A, ce qui suffit à interpoler exactement
+      les heures après W.
+    - La grille écrite s'arrête au dernier relevé de chaque compteur (cf.
+      dense_grid.until_last_reading) : W = A, insert et upsert écrivent les heures après A.
+      Un bord prolongé écrit avant ce découpage (W > A) n'est corrigé qu'en upsert.
+    - Compteur jamais nettoyé (ou sans relevé <= W) : tout l'historique.
+
+    Retourne (partitions, write_after) où write_after = {nom: timestamp ISO exclusif}.
+    """
+    client = client or get_client()
+    watermarks = latest_by_name("counters_clean", names, client=client)
+    anchors = latest_by_name("counters", list(watermarks), upper_bounds=watermarks, client=client)
+
+    partitions, write_after = [], {}
+    for name in names:
+        filters = [("eq", "name", name)]
+        if name in anchors:
+            filters.append(("gte", "timestamp", anchors[name]))
+            cutoff = anchors[name] if mode == "upsert" else watermarks[name]
+            write_after[name] = _iso_utc(cutoff)
+        partitions.append((name, filters))
+    return partitions, write_after
+
@@ -0,0 +1,136 @@
+# src/api/utils/daily_rollup.py
+"""
+Agrégat journalier des compteurs bruts (table counters_daily, cf. sql/counters_daily.sql).
+
+Une ligne par (name, date UTC) : daily_sum, is_zero_day, active_hours (heures avec intensity > 0).
+La mise à jour est incrémentale : pour chaque compteur, seules les heures à partir du dernier
+jour agrégé sont relues (ce jour, peut-être incomplet, est recalculé), puis upsertées.
+Le classement de fiabilité de /process_top10 ne lit plus que cette petite table ; tant qu'elle
+est absente ou vide (sql/counters_daily.sql non exécuté), il est recalculé depuis counters.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.api.utils.bulk_writer import bulk_upsert
+from src.api.utils.supabase_client import get_client
+from src.api.utils.supabase_reader import (
+    FETCH_WORKERS,
+    fetch_table,
+    latest_by_name,
+    list_distinct,
+)
+
+ROLLUP_TABLE = "counters_daily"
+ROLLUP_COLUMNS = ["name", "date", "daily_sum", "is_zero_day", "active_hours"]
+
+
+def aggregate_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """Relevés horaires (name, timestamp UTC, intensity) -> lignes journalières."""
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    df = df.assign(
+        date=df["timestamp"].dt.strftime("%Y-%m-%d"),
+        active=(df["intensity"] > 0).astype(int),
+    )
+    daily = df.groupby(["name", "date"], as_index=False).agg(
+        daily_sum=("intensity", "sum"),
+        active_hours=("active", "sum"),
+    )
+    daily["daily_sum"] = daily["daily_sum"].round().astype(int)
+    daily["is_zero_day"] = daily["daily_sum"] == 0
+    return daily[ROLLUP_COLUMNS]
+
+
+def update_daily_rollup(full_refresh: bool = False, client=None) -> int:
+    """
+    Met à jour counters_daily depuis counters, compteur par compteur.
+    Retourne le nombre de lignes journalières écrites.
+    """
+    client = client or get_client()
+    names = list_distinct("counters", "name", client=client)
+    last_days = {} if full_refresh else latest_by_name(ROLLUP_TABLE, names, column="date", client=client)
+
+    def _rollup(name):
+        filters = [("eq", "name", name)]
+        if name in last_days:
+            filters.append(("gte", "timestamp", f"{str(last_days[name])[:10]}T00:00:00"))
+        df = fetch_table("counters", columns=["intensity"], filters=filters,
+                         parse_dates=["timestamp"], client=client)
+        return aggregate_daily(df)
+
+    print(f"📅 Agrégat journalier : {len(names)} compteurs "
+          f"({'complet' if full_refresh else f'{len(last_days)} incrémentaux'})")
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        frames = [f for f in pool.map(_rollup, names) if not f.empty]
+    if not frames:
+        return 0
+
+    daily = pd.concat(frames, ignore_index=True)
+    report = bulk_upsert(ROLLUP_TABLE, daily, client=client)
+    if report.rows_failed:
+        raise RuntimeError(f"Agrégat journalier incomplet : {report.rows_failed} lignes en échec ({report.errors[0]})")
+    return report.rows_written
+
+
+def try_update_daily_rollup(client=None):
+    """
+    `update_daily_rollup` sans faire échouer l'appelant (table absente, écriture en échec) :
+    retourne (lignes écrites, None) ou (None, message d'erreur).
+    """
+    try:
+        return update_daily_rollup(client=client), None
+    except Exception as e:
+        print(f"⚠️ Agrégat journalier non mis à jour (cf. sql/counters_daily.sql) : {e}")
+        return None, str(e)
+
+
+def _daily_from_raw(since, client) -> pd.DataFrame:
+    """Lignes journalières recalculées depuis la table brute counters (ancien classement)."""
+    filters = [("gte", "timestamp", f"{since}T00:00:00")] if since else []
+    df = fetch_table("counters", columns=["intensity"], filters=filters, parse_dates=["timestamp"], client=client)
+    return aggregate_daily(df)
+
+
+def rank_counters(top_n: int = 10, window_days: int = None, active_start=None, active_end=None,
+                  client=None) -> pd.DataFrame:
+    """
+    Classement de fiabilité depuis counters_daily (depuis counters si elle est absente ou vide).
+
+    - `window_days`  : nombre de jours d'historique pris en compte (None = tout l'historique).
+    - `active_start` / `active_end` : seuls les compteurs avec au moins un jour non nul sur
+      cette période (dates incluses) sont classés.
+
+    taux_panne = jours à zéro (ou sans relevé) / jours de la fenêtre × 100.
+    Retourne les `top_n` meilleurs : name, nb_hs, taux_panne.
+    """
+    client = client or get_client()
+    since = None
+    if window_days:
+        since = (pd.Timestamp.now("UTC").normalize() - pd.Timedelta(days=window_days)).strftime("%Y-%m-%d")
+    try:
+        daily = fetch_table(ROLLUP_TABLE, columns=["daily_sum"], keys=("name", "date"),
+                            filters=[("gte", "date", since)] if since else [], client=client)
+    except Exception as e:
+        print(f"⚠️ {ROLLUP_TABLE} illisible : {e}")
+        daily = pd.DataFrame()
+    if daily.empty:
+        print(f"⚠️ {ROLLUP_TABLE} vide : classement recalculé depuis counters")
+        daily = _daily_from_raw(since, client)
+    if daily.empty:
+        return pd.DataFrame(columns=["name", "nb_hs", "taux_panne"])
+
+    daily["date"] = daily["date"].astype(str).str[:10]
+    n_days = daily["date"].nunique()
+    working_days = daily[daily["daily_sum"] > 0].groupby("name")["date"].nunique()
+
+    ranking = pd.DataFrame({"name": daily["name"].unique()})
+    ranking["nb_hs"] = n_days - ranking["name"].map(working_days).fillna(0).astype(int)
+    ranking["taux_panne"] = ranking["nb_hs"] / n_days * 100
+
+    if active_start is not None and active_end is not None:
+        in_period = daily["date"].between(str(active_start)[:10], str(active_end)[:10])
+        active = daily.loc[in_period & (daily["daily_sum"] > 0), "name"].unique()
+        ranking = ranking[ranking["name"].isin(active)]
+
+    return ranking.sort_values(by="taux_panne", ascending=True, kind="stable").head(top_n).reset_index(drop=True)
@@ -0,0 +1,93 @@
+# src/api/utils/dense_grid.py
+"""
+Grille horaire dense compteurs × heures pour le nettoyage (counters_clean).
+
+Les relevés sont placés par indice entier (compteur, décalage horaire) dans une
+matrice NumPy ; les trous sont comblés par une interpolation linéaire vectorisée
+le long de l'axe du temps (bords prolongés, comme `limit_direction='both'`).
+Le bord final prolongé n'est pas écrit (cf. `until_last_reading`).
+"""
+import numpy as np
+import pandas as pd
+
+HOUR_NS = 3_600_000_000_000
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S+00:00"
+
+
+def hour_offsets(timestamps: pd.Series, start: pd.Timestamp) -> np.ndarray:
+    """Décalage en heures entières depuis `start` (-1 si le timestamp n'est pas une heure pleine)."""
+    values = timestamps.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().astype("datetime64[ns]")
+    origin = np.datetime64(start.tz_convert("UTC").tz_localize(None), "ns")
+    delta = (values - origin).astype(np.int64)
+    return np.where(delta % HOUR_NS == 0, delta // HOUR_NS, -1)
+
+
+def scatter_grid(df: pd.DataFrame, names, start: pd.Timestamp, n_hours: int) -> np.ndarray:
+    """
+    Matrice (len(names), n_hours) des intensités observées, NaN ailleurs.
+    `df` : colonnes name, timestamp (UTC), intensity.
+    """
+    grid = np.full((len(names), n_hours), np.nan)
+    rows = pd.Index(names).get_indexer(df["name"])
+    cols = hour_offsets(df["timestamp"], start)
+    keep = (rows >= 0) & (cols >= 0) & (cols < n_hours)
+    grid[rows[keep], cols[keep]] = df["intensity"].to_numpy(dtype=float)[keep]
+    return grid
+
+
+def interpolate_rows(grid: np.ndarray) -> np.ndarray:
+    """
+    Interpolation linéaire de chaque ligne entre ses valeurs connues ;
+    avant la première / après la dernière, la valeur connue la plus proche.
+    Une ligne entièrement vide reste NaN.
+    """
+    n_rows, n_cols = grid.shape
+    cols = np.arange(n_cols)
+    valid = ~np.isnan(grid)
+
+    prev = np.maximum.accumulate(np.where(valid, cols, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(valid, cols, n_cols)[:, ::-1], axis=1)[:, ::-1]
+    prev = np.where(prev >= 0, prev, nxt)
+    nxt = np.where(nxt < n_cols, nxt, prev)
+    prev = np.clip(prev, 0, n_cols - 1)
+    nxt = np.clip(nxt, 0, n_cols - 1)
+
+    rows = np.arange(n_rows)[:, None]
+    y0 = grid[rows, prev]
+    y1 = grid[rows, nxt]
+    span = nxt - prev
+    weight = np.divide(cols - prev, span, out=np.zeros(grid.shape), where=span > 0)
+    return y0 + (y1 - y0) * weight
+
+
+def dense_clean_grid(df: pd.DataFrame, names, meta: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Grille horaire complète [start, end] des compteurs `names`, interpolée et arrondie.
+    `meta` : name, latitude, longitude. Timestamps ISO UTC (chaînes) prêts pour l'écriture.
+    """
+    hours = pd.date_range(start=start, end=end, freq="h", tz="UTC")
+    grid = scatter_grid(df, names, hours[0], len(hours))
+    values = np.rint(np.nan_to_num(interpolate_rows(grid), nan=0)).astype(np.int64)
+
+    # Une seule mise en forme des heures, répétée pour chaque compteur
+    iso_hours = np.asarray(hours.strftime(ISO_FORMAT))
+    coords = meta.drop_duplicates(subset=["name"]).set_index("name").reindex(names)
+
+    n_hours = len(hours)
+    return pd.DataFrame({
+        "name": np.repeat(np.asarray(names, dtype=object), n_hours),
+        "timestamp": np.tile(iso_hours, len(names)),
+        "intensity": values.ravel(),
+        "latitude": np.repeat(coords["latitude"].to_numpy(), n_hours),
+        "longitude": np.repeat(coords["longitude"].to_numpy(), n_hours),
+    })
+
+
+def until_last_reading(grid: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lignes de la grille (cf. `dense_clean_grid`) jusqu'au dernier relevé brut de chaque
+    compteur de `df` : les heures suivantes, prolongées et non interpolées, changeraient
+    à l'arrivée de nouveaux relevés et ne sont donc jamais écrites.
+    """
+    last = df.groupby("name")["timestamp"].max().dt.tz_convert("UTC").dt.strftime(ISO_FORMAT)
+    return grid[grid["timestamp"] <= grid["name"].map(last).fillna("")]
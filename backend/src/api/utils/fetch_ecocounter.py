@@ -1,6 +1,6 @@
-import requests
 import pandas as pd
 from src.api.config import BASE_URL
+from src.api.utils.http_client import get_json
 
 def fetch_api_counters_list():
     url = f"{BASE_URL}/ecocounter"
@@ -8,9 +8,7 @@ def fetch_api_counters_list():
     all_results = []
 
     while True:
-        r = requests.get(f"{url}?limit={limit}&offset={offset}")
-        r.raise_for_status()
-        data = r.json()
+        data = get_json(url, {"limit": limit, "offset": offset}, source="reference")
         if not data:
             break
         all_results.extend(data)
@@ -29,10 +27,9 @@ def fetch_counter_timeseries(counter_id, start_date, end_date):
     url = f"{BASE_URL}/ecocounter_timeseries/{counter_id}/attrs/intensity"
     params = {"fromDate": start_date, "toDate": end_date}
     
-    r = requests.get(url, params=params)
-    r.raise_for_status()
-    ts = r.json()
-    
+    return timeseries_to_frame(get_json(url, params, source="history"))
+
+def timeseries_to_frame(ts):
     if isinstance(ts, dict) and "index" in ts and "values" in ts and len(ts["index"]) > 0:
         df_temp = pd.DataFrame({
             "timestamp": pd.to_datetime(ts["index"]),
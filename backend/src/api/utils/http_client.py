@@ -0,0 +1,109 @@
+# src/api/utils/http_client.py
+"""
+Couche HTTP partagée par les extracteurs externes (Ecocounter, Open-Meteo, calendriers).
+
+- Une session `requests` par processus : connexions keep-alive réutilisées.
+- Cache disque adressé par contenu : sha256(url + paramètres), avec une durée
+  de vie par source (l'historique n'expire jamais, les prévisions après 1h).
+- HTTP_CACHE_MODE :
+    "cache"  (défaut) : réponse en cache si fraîche, sinon appel réseau puis mise en cache
+    "replay"          : cache uniquement, aucune requête réseau (CacheMiss si absente)
+    "off"             : toujours le réseau, rien n'est mis en cache
+
+Arborescence : HTTP_CACHE_DIR/<source>/<clé[:2]>/<clé>.json
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", "data/http_cache"))
+HTTP_CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "cache")
+
+# Durée de vie du cache par source (secondes, None = jamais périmé)
+CACHE_TTL = {
+    "history": None,      # séries passées : ne changent plus
+    "reference": 86400,   # listes (compteurs, vacances) : mises à jour occasionnelles
+    "forecast": 3600,     # prévisions météo
+}
+
+POOL_SIZE = 10
+
+_session = None
+_lock = threading.Lock()
+
+
+class CacheMiss(LookupError):
+    """Réponse absente du cache alors que HTTP_CACHE_MODE vaut "replay"."""
+
+
+def get_session() -> requests.Session:
+    """Session partagée (créée au premier appel)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def cache_key(url: str, params=None) -> str:
+    """Clé de cache : sha256 de l'URL et des paramètres triés."""
+    payload = json.dumps([url, sorted((params or {}).items())], default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(source: str, key: str) -> Path:
+    if source not in CACHE_TTL:
+        raise ValueError(f"Source de cache inconnue : {source}")
+    return HTTP_CACHE_DIR / source / key[:2] / f"{key}.json"
+
+
+def lookup(url: str, params=None, source: str = "history"):
+    """
+    Corps (texte) de la réponse en cache s'il est encore valide, sinon None.
+    En mode "replay", une absence lève CacheMiss.
+    """
+    if HTTP_CACHE_MODE == "off":
+        return None
+    path = _cache_path(source, cache_key(url, params))
+    if path.exists():
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        ttl = CACHE_TTL[source]
+        if HTTP_CACHE_MODE == "replay" or ttl is None or time.time() - entry["fetched_at"] < ttl:
+            return entry["body"]
+    if HTTP_CACHE_MODE == "replay":
+        raise CacheMiss(f"{url} {params or ''}")
+    return None
+
+
+def store(url: str, params, source: str, body: str) -> None:
+    """Met en cache le corps d'une réponse réussie (écriture atomique)."""
+    if HTTP_CACHE_MODE == "off":
+        return
+    path = _cache_path(source, cache_key(url, params))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {"url": url, "params": params, "fetched_at": time.time(), "body": body}
+    tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(entry, default=str, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def get_json(url: str, params=None, source: str = "history", timeout: float = 30):
+    """GET JSON via la session partagée et le cache disque. Lève HTTPError si statut >= 400."""
+    body = lookup(url, params, source)
+    if body is None:
+        r = get_session().get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        body = r.text
+        store(url, params, source, body)
+    return json.loads(body)
@@ -0,0 +1,216 @@
+# src/api/utils/parquet_mirror.py
+"""
+Miroir Parquet local des tables historiques Supabase.
+
+Arborescence : MIRROR_DIR/<table>/month=YYYY-MM/part-<horodatage>.parquet
+               MIRROR_DIR/<table>/_watermarks.json   (dernier timestamp synchronisé)
+
+Chaque synchronisation relit les MIRROR_RESYNC_DAYS derniers jours avant le watermark et
+remplace ces lignes dans le miroir : les lignes réécrites sur place côté Supabase (upsert,
+fenêtre de recouvrement du nettoyage incrémental) y sont ainsi rafraîchies.
+`full=True` reconstruit la table entière (après une reconstruction complète côté Supabase,
+ex. process_top10 ou run-final-dataset avec full_refresh).
+
+Usage : python -m src.api.utils.parquet_mirror [--full] [table ...]
+"""
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from src.api.utils.supabase_reader import (
+    fetch_table_parallel,
+    list_distinct,
+    month_partitions,
+)
+
+MIRROR_DIR = Path(os.getenv("MIRROR_DIR", "data/mirror"))
+
+# "supabase" (défaut) ou "mirror" : source de lecture de l'entraînement et des stats
+DATA_SOURCE = os.getenv("DATA_SOURCE", "supabase")
+
+# Fenêtre relue avant chaque watermark (lignes susceptibles d'avoir été réécrites)
+RESYNC_DAYS = int(os.getenv("MIRROR_RESYNC_DAYS", "31"))
+
+# Tables synchronisables : clé de pagination, colonne temporelle,
+# et watermark par compteur (per_name) ou global.
+MIRROR_TABLES = {
+    "counters_final": {"keys": ("name", "timestamp"), "time_column": "timestamp", "per_name": True},
+    "counters_clean": {"keys": ("name", "timestamp"), "time_column": "timestamp", "per_name": True},
+    "meteo_history": {"keys": ("time",), "time_column": "time", "per_name": False},
+}
+
+GLOBAL_WATERMARK = "*"
+
+
+def _table_dir(table_name: str) -> Path:
+    if table_name not in MIRROR_TABLES:
+        raise ValueError(f"Table non gérée par le miroir : {table_name}")
+    return MIRROR_DIR / table_name
+
+
+def load_watermarks(table_name: str) -> dict:
+    """Dernier timestamp synchronisé (valeur brute Supabase) par compteur, ou global ("*")."""
+    path = _table_dir(table_name) / "_watermarks.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_watermarks(table_name: str, watermarks: dict) -> None:
+    path = _table_dir(table_name) / "_watermarks.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(watermarks, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)  # écriture atomique
+
+
+def _resync_from(watermark):
+    """Début de la fenêtre relue pour un watermark brut Supabase (même format ISO)."""
+    ts = pd.Timestamp(watermark) - pd.Timedelta(days=RESYNC_DAYS)
+    return ts.isoformat()
+
+
+def _replace_months(table_dir: Path, time_col: str, df: pd.DataFrame, stale) -> None:
+    """
+    Réécrit les partitions mensuelles touchées : lignes existantes sans `stale(existing)`
+    + nouvelles lignes de `df`, en un seul fichier par mois (les anciens fichiers sont supprimés).
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    new_months = dict(tuple(df.groupby(df[time_col].dt.strftime("%Y-%m"))))
+    first_month = min(new_months)
+    months = set(new_months) | {
+        d.name.split("=", 1)[1] for d in table_dir.glob("month=*") if d.name.split("=", 1)[1] >= first_month
+    }
+
+    for month in sorted(months):
+        month_dir = table_dir / f"month={month}"
+        month_dir.mkdir(exist_ok=True)
+        old_files = sorted(month_dir.glob("*.parquet"))
+        parts = [pd.read_parquet(f) for f in old_files]
+        parts = [part[~stale(part)] for part in parts]
+        if month in new_months:
+            parts.append(new_months[month])
+        parts = [part for part in parts if not part.empty]
+        if parts:
+            pd.concat(parts, ignore_index=True).to_parquet(month_dir / f"part-{stamp}.parquet", index=False)
+        for f in old_files:
+            f.unlink()
+
+
+def sync_table(table_name: str, client=None, full: bool = False) -> int:
+    """
+    Met à jour le miroir avec les lignes à partir de (watermark - RESYNC_DAYS), par compteur
+    pour les tables de compteurs ; les lignes existantes de cette fenêtre sont remplacées.
+    `full` : ignore les watermarks et reconstruit la table entière.
+    Retourne le nombre de lignes téléchargées.
+    """
+    spec = MIRROR_TABLES[table_name]
+    table_dir = _table_dir(table_name)
+    if full and table_dir.exists():
+        shutil.rmtree(table_dir)
+    table_dir.mkdir(parents=True, exist_ok=True)
+    time_col = spec["time_column"]
+    watermarks = load_watermarks(table_name)
+
+    print(f"🔄 Synchronisation du miroir '{table_name}'{' (complète)' if full else ''}...")
+    if spec["per_name"]:
+        # Un compteur sans watermark (nouveau) est téléchargé en entier
+        starts = {name: _resync_from(mark) for name, mark in watermarks.items()}
+        partitions = []
+        for name in list_distinct(table_name, "name", client=client):
+            part_filters = [("eq", "name", name)]
+            if name in starts:
+                part_filters.append(("gte", time_col, starts[name]))
+            partitions.append((name, part_filters))
+        df = fetch_table_parallel(table_name, partitions, keys=spec["keys"], client=client)
+    else:
+        filters = []
+        if GLOBAL_WATERMARK in watermarks:
+            filters.append(("gte", time_col, _resync_from(watermarks[GLOBAL_WATERMARK])))
+        partitions = month_partitions(table_name, time_column=time_col, filters=filters, client=client)
+        df = fetch_table_parallel(table_name, partitions, keys=spec["keys"], filters=filters, client=client)
+
+    if df.empty:
+        print("   ✅ Miroir déjà à jour.")
+        return 0
+
+    # Watermarks calculés sur les valeurs brutes (même format que les filtres Supabase)
+    if spec["per_name"]:
+        watermarks.update(df.groupby("name")[time_col].max().to_dict())
+    else:
+        watermarks[GLOBAL_WATERMARK] = df[time_col].max()
+
+    df[time_col] = pd.to_datetime(df[time_col], utc=True)
+
+    # Lignes du miroir couvertes par la fenêtre relue (remplacées par celles de df)
+    if spec["per_name"]:
+        bounds = {name: _utc(start) for name, start in starts.items()}
+
+        def stale(part):
+            start = pd.to_datetime(part["name"].astype(str).map(bounds), utc=True)
+            return part[time_col] >= start  # NaT (compteur sans watermark) -> False
+    else:
+        bound = _utc(filters[0][2]) if filters else None
+
+        def stale(part):
+            if bound is None:
+                return pd.Series(False, index=part.index)
+            return part[time_col] >= bound
+
+    _replace_months(table_dir, time_col, df, stale)
+
+    _save_watermarks(table_name, watermarks)
+    print(f"   ✅ {len(df)} lignes synchronisées dans le miroir '{table_name}'.")
+    return len(df)
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def read_mirror(table_name: str, columns=None, start=None, end=None) -> pd.DataFrame:
+    """
+    Lit le miroir local avec élagage des colonnes et des partitions mensuelles.
+    `start` (inclus) et `end` (exclu) filtrent sur la colonne temporelle de la table (UTC).
+    """
+    spec = MIRROR_TABLES[table_name]
+    time_col = spec["time_column"]
+    start = _utc(start) if start is not None else None
+    end = _utc(end) if end is not None else None
+
+    files = []
+    for month_dir in sorted(_table_dir(table_name).glob("month=*")):
+        month = month_dir.name.split("=", 1)[1]
+        if start is not None and month < start.strftime("%Y-%m"):
+            continue
+        if end is not None and month > end.strftime("%Y-%m"):
+            continue
+        files.extend(sorted(month_dir.glob("*.parquet")))
+
+    read_cols = list(dict.fromkeys(list(columns) + [time_col])) if columns else None
+    if not files:
+        df = pd.DataFrame(columns=read_cols or [])
+        if time_col in df.columns:
+            df[time_col] = pd.to_datetime(df[time_col], utc=True)
+        return df
+
+    df = pd.concat([pd.read_parquet(f, columns=read_cols) for f in files], ignore_index=True)
+    if start is not None:
+        df = df[df[time_col] >= start]
+    if end is not None:
+        df = df[df[time_col] < end]
+    if columns and time_col not in columns:
+        df = df.drop(columns=[time_col])
+    return df.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    full = "--full" in args
+    for table in [a for a in args if a != "--full"] or MIRROR_TABLES:
+        sync_table(table, full=full)
@@ -0,0 +1,75 @@
+# src/api/utils/serialization.py
+"""
+Sérialisation vectorisée DataFrame -> corps JSON des requêtes d'insertion.
+
+- timestamps : une opération numpy par colonne (`np.datetime_as_string`), sans apply ligne à ligne
+- lots       : `DataFrame.to_json(orient="records")` (encodeur C de pandas) directement en bytes,
+               sans dictionnaires Python intermédiaires ; chaque tranche est encodée au moment
+               de son envoi (au plus un lot encodé par requête en cours)
+"""
+import numpy as np
+import pandas as pd
+
+from src.api.utils.schema import storage_safe
+
+# Lignes encodées pour estimer la taille moyenne d'une ligne JSON
+SAMPLE_ROWS = 200
+
+# Chiffres significatifs des flottants (maximum de `to_json`, 10 par défaut tronquerait les coordonnées)
+DOUBLE_PRECISION = 15
+
+
+def iso_strings(values: pd.Series, unit: str = "s") -> np.ndarray:
+    """
+    Colonne datetime -> chaînes ISO 8601 ("2025-01-01T05:00:00", suffixe "+00:00" si la
+    colonne a un fuseau ; "2025-01-01" avec unit="D"). NaT -> None.
+    """
+    aware = getattr(values.dtype, "tz", None) is not None
+    if aware:
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    stamps = values.to_numpy(dtype="datetime64[ns]")
+    text = np.datetime_as_string(stamps.astype(f"datetime64[{unit}]"), unit=unit)
+    if aware and unit != "D":
+        text = np.char.add(text, "+00:00")
+    out = text.astype(object)
+    out[np.isnat(stamps)] = None
+    return out
+
+
+def format_timestamps(df: pd.DataFrame, columns=None, unit: str = "s") -> pd.DataFrame:
+    """Copie superficielle de `df` avec les colonnes datetime (ou `columns`) en chaînes ISO."""
+    out = df.copy(deep=False)
+    if columns is None:
+        columns = out.select_dtypes(include=["datetime", "datetimetz"]).columns
+    for col in columns:
+        out[col] = iso_strings(out[col], unit=unit)
+    return out
+
+
+def to_payload(df: pd.DataFrame) -> pd.DataFrame:
+    """DataFrame prêt à encoder : types compacts élargis (cf. `storage_safe`) et timestamps ISO."""
+    return format_timestamps(storage_safe(df))
+
+
+def encode_records(df: pd.DataFrame) -> bytes:
+    """Lignes de `df` -> tableau JSON d'objets, en bytes UTF-8 (NaN / None -> null)."""
+    return df.to_json(orient="records", force_ascii=False, double_precision=DOUBLE_PRECISION).encode("utf-8")
+
+
+def rows_per_batch(df: pd.DataFrame, max_bytes: int, max_rows: int) -> int:
+    """Nombre de lignes par lot pour rester sous `max_bytes`, estimé sur un échantillon encodé."""
+    step = max(1, len(df) // SAMPLE_ROWS)
+    sample = df.iloc[::step].iloc[:SAMPLE_ROWS]
+    avg_bytes = len(encode_records(sample)) / len(sample)
+    return int(max(1, min(max_rows, max_bytes // avg_bytes)))
+
+
+def frame_batches(df: pd.DataFrame, max_bytes: int, max_rows: int) -> list:
+    """
+    Découpe `df` (déjà passé par `to_payload`) en tranches de lignes (vues, sans copie)
+    à encoder au moment de l'envoi avec `encode_records`.
+    """
+    if df.empty:
+        return []
+    size = rows_per_batch(df, max_bytes, max_rows)
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
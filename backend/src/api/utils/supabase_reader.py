@@ -0,0 +1,238 @@
+# src/api/utils/supabase_reader.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.api.utils.supabase_client import get_client
+
+# Limite "max rows" par défaut de PostgREST sur Supabase : une page plus grande
+# serait tronquée côté serveur et arrêterait la lecture trop tôt.
+PAGE_SIZE = 1000
+
+# Nombre de partitions téléchargées en parallèle (à ajuster selon le rate limit)
+FETCH_WORKERS = int(os.getenv("SUPABASE_FETCH_WORKERS", "4"))
+
+TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _quote(value) -> str:
+    """Protège une valeur pour l'utiliser dans un filtre PostgREST `or=(...)`."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_condition(keys, last_row) -> str:
+    """
+    Traduit (k1, k2, ...) > (v1, v2, ...) en filtre PostgREST :
+    k1 > v1 OU (k1 = v1 ET k2 > v2) OU ...
+    """
+    clauses = []
+    for i, key in enumerate(keys):
+        parts = [f"{k}.eq.{_quote(last_row[k])}" for k in keys[:i]]
+        parts.append(f"{key}.gt.{_quote(last_row[key])}")
+        clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return ",".join(clauses)
+
+
+def fetch_table(
+    table_name: str,
+    columns=None,
+    keys=("name", "timestamp"),
+    filters=None,
+    parse_dates=None,
+    page_size: int = PAGE_SIZE,
+    client=None,
+) -> pd.DataFrame:
+    """
+    Lit une table Supabase en entier par pagination "keyset".
+
+    - `columns`     : colonnes à récupérer (None = toutes). Les clés sont toujours ajoutées.
+    - `keys`        : clé de tri unique servant de curseur, ex. ("name", "timestamp"),
+                      ("time",) pour la météo ou ("date",) pour le calendrier.
+    - `filters`     : filtres poussés côté serveur, liste de tuples (opérateur, colonne, valeur),
+                      ex. [("gt", "timestamp", watermark), ("eq", "name", "Compteur X")].
+    - `parse_dates` : colonnes converties en datetime UTC à la construction du DataFrame.
+
+    Chaque page repart de la dernière clé lue (`WHERE (name, timestamp) > (...)`) au lieu
+    d'un OFFSET : le coût d'une page reste constant quelle que soit sa position.
+    """
+    client = client or get_client()
+    keys = list(keys)
+    select_cols = list(dict.fromkeys(keys + list(columns))) if columns else None
+    select_str = ", ".join(select_cols) if select_cols else "*"
+
+    data = {}  # colonne -> liste de valeurs (pas de liste de dicts intermédiaire)
+    last_row = None
+
+    while True:
+        query = client.table(table_name).select(select_str)
+        for op, column, value in filters or []:
+            query = getattr(query, op)(column, value)
+
+        if last_row is not None:
+            if len(keys) == 1:
+                query = query.gt(keys[0], last_row[keys[0]])
+            else:
+                query = query.or_(_keyset_condition(keys, last_row))
+
+        for key in keys:
+            query = query.order(key)
+
+        rows = query.limit(page_size).execute().data
+        if not rows:
+            break
+
+        if not data:
+            for col in select_cols or rows[0].keys():
+                data[col] = []
+        for col, values in data.items():
+            values.extend(row.get(col) for row in rows)
+
+        # Page incomplète : inutile de refaire un aller-retour pour une page vide
+        if len(rows) < page_size:
+            break
+        last_row = rows[-1]
+
+    df = pd.DataFrame(data, columns=select_cols or list(data))
+    for col in parse_dates or []:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True)
+    return df
+
+
+# ------------------------------
+# Téléchargement parallèle par partitions
+# ------------------------------
+def list_distinct(table_name: str, column: str, client=None) -> list:
+    """
+    Valeurs distinctes d'une colonne, par "saut" dans l'index :
+    une requête `limit 1` par valeur au lieu d'un scan complet.
+    """
+    client = client or get_client()
+    values = []
+    while True:
+        query = client.table(table_name).select(column).order(column).limit(1)
+        if values:
+            query = query.gt(column, values[-1])
+        rows = query.execute().data
+        if not rows:
+            break
+        values.append(rows[0][column])
+    return values
+
+
+def latest_by_name(table_name: str, names, column: str = "timestamp", upper_bounds: dict = None,
+                   client=None) -> dict:
+    """
+    Dernière valeur de `column` pour chaque `name` (high-water mark) :
+    une requête `order desc limit 1` par nom, lancées en parallèle.
+    `upper_bounds` ({nom: valeur}) limite la recherche à `column <= valeur`.
+    Les noms sans valeur ne figurent pas dans le résultat.
+    """
+    client = client or get_client()
+    upper_bounds = upper_bounds or {}
+
+    def last_value(name):
+        query = client.table(table_name).select(column).eq("name", name)
+        if name in upper_bounds:
+            query = query.lte(column, upper_bounds[name])
+        rows = query.order(column, desc=True).limit(1).execute().data
+        return name, rows[0][column] if rows else None
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        return {name: value for name, value in pool.map(last_value, names) if value is not None}
+
+
+def name_partitions(table_name: str, names=None, column: str = "name", client=None) -> list:
+    """Une partition par compteur : [(label, filtres), ...]."""
+    if names is None:
+        names = list_distinct(table_name, column, client=client)
+    return [(name, [("eq", column, name)]) for name in names]
+
+
+def time_bounds(table_name: str, time_column: str = "timestamp", filters=None, client=None):
+    """
+    (premier, dernier) `time_column` de la table, en UTC naïf (2 requêtes `order limit 1`) ;
+    None si aucune ligne ne correspond aux filtres.
+    """
+    client = client or get_client()
+    bounds = []
+    for desc in (False, True):
+        query = client.table(table_name).select(time_column)
+        for op, column, value in filters or []:
+            query = getattr(query, op)(column, value)
+        rows = query.order(time_column, desc=desc).limit(1).execute().data
+        if not rows:
+            return None
+        ts = pd.Timestamp(rows[0][time_column])
+        bounds.append(ts.tz_convert(None) if ts.tzinfo else ts)
+    return tuple(bounds)
+
+
+def month_partitions(table_name: str, time_column: str = "timestamp", filters=None, client=None) -> list:
+    """
+    Une partition par mois calendaire [début, fin[ entre le premier et le dernier
+    `time_column` de la table (cf. `time_bounds`).
+    """
+    bounds = time_bounds(table_name, time_column, filters=filters, client=client)
+    if bounds is None:
+        return []
+
+    partitions = []
+    for period in pd.period_range(bounds[0], bounds[1], freq="M"):
+        start = period.start_time.strftime(TS_FORMAT)
+        end = (period + 1).start_time.strftime(TS_FORMAT)
+        partitions.append((str(period), [("gte", time_column, start), ("lt", time_column, end)]))
+    return partitions
+
+
+def fetch_table_parallel(
+    table_name: str,
+    partitions: list,
+    columns=None,
+    keys=("name", "timestamp"),
+    filters=None,
+    parse_dates=None,
+    max_workers: int = None,
+    client=None,
+) -> pd.DataFrame:
+    """
+    Télécharge une table découpée en partitions disjointes (cf. `name_partitions`,
+    `month_partitions`) sur un pool de threads borné, puis les réassemble dans
+    l'ordre des partitions.
+
+    Chaque partition est lue avec `fetch_table` ; un débit par partition est affiché
+    et le détail est conservé dans `df.attrs["partitions"]`.
+    """
+    client = client or get_client()
+    max_workers = max_workers or FETCH_WORKERS
+
+    def _fetch(partition):
+        label, part_filters = partition
+        start = time.perf_counter()
+        df_part = fetch_table(
+            table_name, columns=columns, keys=keys,
+            filters=list(filters or []) + part_filters,
+            parse_dates=parse_dates, client=client,
+        )
+        elapsed = time.perf_counter() - start
+        rate = len(df_part) / elapsed if elapsed > 0 else 0
+        print(f"      -> [{table_name} | {label}] {len(df_part)} lignes en {elapsed:.1f}s ({rate:.0f} lignes/s)")
+        return df_part, {"partition": label, "rows": len(df_part), "seconds": round(elapsed, 3)}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_fetch, partitions))  # map conserve l'ordre des partitions
+    elapsed = time.perf_counter() - start
+
+    frames = [df_part for df_part, _ in results if not df_part.empty]
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=list(dict.fromkeys(list(keys) + list(columns or []))))
+
+    rate = len(df) / elapsed if elapsed > 0 else 0
+    print(f"   ⏱️ {table_name} : {len(df)} lignes, {len(partitions)} partitions, "
+          f"{max_workers} threads, {elapsed:.1f}s ({rate:.0f} lignes/s)")
+    df.attrs["partitions"] = [stats for _, stats in results]
+    return df
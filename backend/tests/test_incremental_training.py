@@ -0,0 +1,55 @@
+# tests/test_incremental_training.py
+"""
+Ré-entraînement incrémental (pipeline_train.fit_or_top_up) sur le dataset synthétique des
+benchmarks : le watermark vient du manifeste du run précédent et le découpage du dernier
+relevé chargé (loader.data_cutoff).
+
+Usage (depuis backend/) : python -m pytest tests
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.bench_parallel_training import synthetic_training_set
+from train_model_xgboost import loader, pipeline_train, registry, saver
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(tmp_path, monkeypatch):
+    """Registre dans un dossier temporaire (les artefacts réels ne sont pas touchés)."""
+    monkeypatch.setattr(saver, "ARTIFACTS_DIR", tmp_path)
+    monkeypatch.setattr(registry, "ARTIFACTS_DIR", tmp_path)
+    return tmp_path
+
+
+def _train(df, incremental):
+    states = saver.load_training_state() if incremental else {}
+    run = registry.start_run("per_counter")
+    results = pipeline_train.train_counters(df, n_workers=1, states=states, run=run)
+    registry.finish_run(run)
+    return results, states
+
+
+def test_data_cutoff_follows_latest_reading():
+    assert loader.data_cutoff(synthetic_training_set(1, "2025-01-01", "2025-12-31")) == loader.CUTOFF_DATE
+    assert loader.data_cutoff(synthetic_training_set(1, "2025-01-01", "2026-02-28")) == pd.Timestamp("2026-01-28")
+
+
+def test_no_new_rows_keeps_model():
+    df = synthetic_training_set(2, "2025-01-01", "2025-12-31")
+    _, first = _train(df, incremental=False)
+    results, states = _train(df, incremental=True)
+
+    assert [row["Entraînement"] for row in results] == ["inchangé", "inchangé"]
+    assert states == first
+
+
+def test_new_rows_after_watermark_top_up(monkeypatch):
+    # Toute dégradation tolérée : le modèle complété est gardé tel quel
+    monkeypatch.setattr(pipeline_train, "INCREMENTAL_TOLERANCE", float("inf"))
+    _, first = _train(synthetic_training_set(2, "2025-01-01", "2025-12-31"), incremental=False)
+    results, states = _train(synthetic_training_set(2, "2025-01-01", "2026-02-28"), incremental=True)
+
+    assert [row["Entraînement"] for row in results] == ["incrémental", "incrémental"]
+    for name, state in states.items():
+        assert pd.Timestamp(state["watermark"]) > pd.Timestamp(first[name]["watermark"])
+    assert saver.load_training_state() == states
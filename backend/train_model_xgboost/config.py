@@ -18,4 +18,37 @@ ARTIFACTS_DIR = BASE_DIR / "train_model_xgboost" / "artifacts"
 ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Date de séparation (reste utile pour l'entrainement)
-CUTOFF_DATE = "2025-11-30"
\ No newline at end of file
+CUTOFF_DATE = "2025-11-30"
+
+# Entraînement parallèle : nombre de processus (0 = automatique, 1 = séquentiel).
+# Les threads XGBoost sont répartis pour que processus × n_jobs = nombre de coeurs.
+TRAIN_WORKERS = int(os.getenv("XGBOOST_TRAIN_WORKERS", "0"))
+
+# Mode de modélisation : per_counter (un modèle par compteur) | global (un seul modèle,
+# le compteur en feature catégorielle)
+MODEL_MODE = os.getenv("XGBOOST_MODEL_MODE", "per_counter")
+GLOBAL_MODEL_NAME = "global"  # -> artifacts/runs/<run_id>/global.ubj
+
+# Format natif des boosters du registre (registry.py) : ubj (UBJSON, compact) | json (lisible)
+MODEL_FORMAT = os.getenv("XGBOOST_MODEL_FORMAT", "ubj")
+
+# Early stopping : les N derniers jours avant CUTOFF_DATE servent de validation
+VALIDATION_DAYS = int(os.getenv("XGBOOST_VALIDATION_DAYS", "28"))
+
+# Test : les N derniers jours du dataset, dès que de nouveaux mois repoussent son dernier
+# relevé au-delà de CUTOFF_DATE + N jours (cf. loader.data_cutoff)
+TEST_DAYS = int(os.getenv("XGBOOST_TEST_DAYS", "31"))
+
+# Méthode "hist" : nombre max de classes par feature (moins = plus rapide, moins fin)
+MAX_BIN = int(os.getenv("XGBOOST_MAX_BIN", "256"))
+
+# Ré-entraînement incrémental : arbres ajoutés au plus au modèle existant, et dégradation
+# tolérée de la MAE de validation (vs dernier entraînement complet) avant de tout ré-entraîner
+INCREMENTAL_ROUNDS = int(os.getenv("XGBOOST_INCREMENTAL_ROUNDS", "100"))
+INCREMENTAL_TOLERANCE = float(os.getenv("XGBOOST_INCREMENTAL_TOLERANCE", "0.10"))
+
+# Réglage des hyperparamètres (tuner.py) : successive halving, `TUNING_CANDIDATES` tirés au
+# hasard, `TUNING_MIN_ROUNDS` arbres au premier tour, 1/TUNING_ETA gardés à chaque tour
+TUNING_CANDIDATES = int(os.getenv("XGBOOST_TUNING_CANDIDATES", "27"))
+TUNING_MIN_ROUNDS = int(os.getenv("XGBOOST_TUNING_MIN_ROUNDS", "50"))
+TUNING_ETA = int(os.getenv("XGBOOST_TUNING_ETA", "3"))
@@ -1,5 +1,8 @@
 import pandas as pd
-from src.api.utils.supabase_client import supabase  # <-- подключаем готовый клиент
+from src.api.utils.supabase_reader import fetch_table_parallel, name_partitions
+from src.api.utils import parquet_mirror
+from src.api.utils.schema import apply_schema
+from train_model_xgboost.config import TEST_DAYS
 
 # --- CONSTANTE GLOBALE DES FEATURES ---
 FEATURES_XGBOOST = [
@@ -8,46 +11,45 @@ FEATURES_XGBOOST = [
     'is_vacances', 'is_ferie', 'is_weekend'
 ]
 
+# Modèle global : le compteur devient une feature catégorielle, avec ses coordonnées
+FEATURES_GLOBAL = ['name', 'latitude', 'longitude'] + FEATURES_XGBOOST
+
+# Colonnes lues dans counters_final (features brutes + cible)
+DATASET_COLUMNS = [
+    'name', 'timestamp', 'intensity', 'latitude', 'longitude',
+    'temperature_2m', 'precipitation', 'precipitation_class', 'windspeed_10m', 'is_raining',
+    'is_vacances', 'is_ferie', 'is_weekend'
+]
+
 TABLE_NAME = "counters_final"
 CUTOFF_DATE = pd.Timestamp("2025-11-30")  # можно оставить в коде, если не используем config
 
 
-def load_full_dataset():
+def load_full_dataset(source: str = None):
     """
-    Charge tout le dataset depuis Supabase avec PAGINATION.
-    Récupère par blocs de 1000 lignes jusqu'à épuisement.
+    Charge tout le dataset depuis Supabase (pagination keyset) ou depuis le
+    miroir Parquet local (`source="mirror"`, cf. DATA_SOURCE).
+    Seules les colonnes utiles à l'entraînement sont lues ; côté Supabase,
+    un compteur par partition, en parallèle.
     """
-    print(f"🌍 Connexion à Supabase (Table: {TABLE_NAME})...")
-    
-    all_rows = []
-    offset = 0
-    limit = 1000
-    
-    print("   ⏳ Téléchargement en cours (pagination)...")
-    
-    while True:
-        # On récupère un bloc de lignes (range est inclusif)
-        response = supabase.table(TABLE_NAME).select("*").range(offset, offset + limit - 1).execute()
-        rows = response.data
-        
-        if not rows:
-            break
-            
-        all_rows.extend(rows)
-        offset += limit
-        
-        if offset % 10000 == 0:
-            print(f"      -> {offset} lignes récupérées...")
-
-    # Conversion en DataFrame
-    df = pd.DataFrame(all_rows)
+    source = source or parquet_mirror.DATA_SOURCE
+
+    if source == "mirror":
+        print(f"💾 Lecture du miroir local (Table: {TABLE_NAME})...")
+        df = parquet_mirror.read_mirror(TABLE_NAME, columns=DATASET_COLUMNS)
+    else:
+        print(f"🌍 Connexion à Supabase (Table: {TABLE_NAME})...")
+        print("   ⏳ Téléchargement en cours (pagination)...")
+        partitions = name_partitions(TABLE_NAME)
+        df = fetch_table_parallel(TABLE_NAME, partitions, columns=DATASET_COLUMNS, parse_dates=['timestamp'])
     print(f"   ✅ Chargé au total : {len(df)} lignes.")
 
-    # Conversion timestamp en datetime
+    # Timestamps UTC naïfs (comparés à CUTOFF_DATE)
     if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
-    
-    return df
+        df['timestamp'] = df['timestamp'].dt.tz_localize(None)
+
+    # Types compacts (category, int8, float32...) : cf. src/api/utils/schema.py
+    return apply_schema(df, label=TABLE_NAME)
 
 
 def create_features(df):
@@ -63,28 +65,87 @@ def create_features(df):
     df['month'] = df['timestamp'].dt.month
     df['year'] = df['timestamp'].dt.year
     df['dayofyear'] = df['timestamp'].dt.dayofyear
-    return df
+    return apply_schema(df)
 
 
-def get_data_for_counter(df, counter_name):
-    """Prépare X (Features) et y (Cible) pour un compteur."""
-    # 1. Filtre compteur
-    df_c = df[df['name'] == counter_name].copy()
-    
-    # 2. Création des features temporelles
-    df_c = create_features(df_c)
-    
+def counter_rows(df):
+    """Positions des lignes de chaque compteur : {name: np.ndarray}, en un seul passage."""
+    return df.groupby('name', observed=True, sort=False).indices
+
+
+def data_cutoff(df, test_days=TEST_DAYS):
+    """
+    Début du test d'après les données réellement chargées : `test_days` jours avant le
+    jour du dernier relevé, jamais avant CUTOFF_DATE. Avance quand de nouveaux mois arrivent.
+    """
+    if df.empty:
+        return CUTOFF_DATE
+    return max(CUTOFF_DATE, df['timestamp'].max().normalize() - pd.Timedelta(days=test_days))
+
+
+def train_end(validation_days=0, cutoff=None):
+    """Fin (exclue) des données d'entraînement : début de la fenêtre de validation."""
+    return (CUTOFF_DATE if cutoff is None else cutoff) - pd.Timedelta(days=validation_days)
+
+
+def split_features(df_c, features, validation_days=0, since=None, cutoff=None):
+    """
+    Split temporel d'un DataFrame déjà enrichi (cf. `create_features`) :
+    train < `cutoff` (défaut CUTOFF_DATE, cf. `data_cutoff`) <= test, et fenêtre de
+    validation = `validation_days` derniers jours du train (vide si 0). `since` : seules
+    les lignes de train à partir de cette date sont gardées (ré-entraînement incrémental).
+    Retourne X_train, y_train, X_test, y_test, dates_test, X_val, y_val.
+    """
+    cutoff = CUTOFF_DATE if cutoff is None else cutoff
+    # Relevés manquants (intensity <NA>, cf. schema) : pas de cible, ni en train ni en test
+    df_c = df_c[df_c['intensity'].notna()]
+
     # 3. Split Temporel
-    train = df_c[df_c['timestamp'] < CUTOFF_DATE]
-    test = df_c[df_c['timestamp'] >= CUTOFF_DATE]
+    train = df_c[df_c['timestamp'] < cutoff]
+    test = df_c[df_c['timestamp'] >= cutoff]
+
+    # 3b. Fenêtre de validation : fin de la période d'entraînement
+    val_start = train_end(validation_days, cutoff)
+    val = train[train['timestamp'] >= val_start]
+    train = train[train['timestamp'] < val_start]
+    if since is not None:
+        train = train[train['timestamp'] >= pd.Timestamp(since)]
     
     # 4. Sélection des colonnes
     TARGET = 'intensity'
 
-    X_train = train[FEATURES_XGBOOST]
+    X_train = train[features]
     y_train = train[TARGET]
     
-    X_test = test[FEATURES_XGBOOST]
+    X_test = test[features]
     y_test = test[TARGET]
+
+    X_val = val[features]
+    y_val = val[TARGET]
+
+    return X_train, y_train, X_test, y_test, test['timestamp'], X_val, y_val
+
+
+def get_data_for_counter(df, counter_name, rows=None, validation_days=0, since=None, cutoff=None):
+    """
+    Prépare X (Features) et y (Cible) pour un compteur.
+    `rows` (cf. `counter_rows`) évite de re-filtrer tout le dataset pour chaque compteur.
+    `validation_days` : les derniers jours avant `cutoff` (défaut CUTOFF_DATE) sont retirés
+    du train et retournés à part (X_val, y_val) pour l'early stopping ; vides si 0.
+    `since` : train limité aux lignes arrivées depuis cette date (cf. `split_features`).
+    """
+    # 1. Filtre compteur
+    df_c = df.iloc[rows] if rows is not None else df[df['name'] == counter_name]
     
-    return X_train, y_train, X_test, y_test, test['timestamp']
+    # 2. Création des features temporelles
+    df_c = create_features(df_c)
+
+    return split_features(df_c, FEATURES_XGBOOST, validation_days, since, cutoff)
+
+
+def get_global_data(df, validation_days=0, since=None, cutoff=None):
+    """
+    Prépare X et y pour le modèle global (tous les compteurs) :
+    FEATURES_GLOBAL = compteur (category) + coordonnées + features du modèle par compteur.
+    """
+    return split_features(create_features(df), FEATURES_GLOBAL, validation_days, since, cutoff)
@@ -0,0 +1,155 @@
+# train_model_xgboost/registry.py
+"""
+Registre des modèles XGBoost, versionné par entraînement :
+
+    artifacts/runs/<run_id>/<compteur>.ubj   booster au format natif XGBoost (UBJSON ou JSON)
+    artifacts/runs/<run_id>/manifest.json   compteur -> fichier, features, arbres, métriques, watermark
+    artifacts/current.json                  run_id du run servi par la prédiction
+
+Un run reprend les modèles du run courant qu'il ne ré-entraîne pas (ex. le modèle global
+lors d'un run par compteur) : son manifeste décrit à lui seul tout ce qui est servi.
+La promotion remplace current.json d'un bloc (os.replace) : revenir à un run précédent
+revient à le promouvoir à nouveau.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+import xgboost as xgb
+
+from train_model_xgboost import trainer
+from train_model_xgboost.config import ARTIFACTS_DIR, MODEL_FORMAT
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "current.json"
+
+
+def _runs_dir():
+    return ARTIFACTS_DIR / "runs"
+
+
+def _write_json(path, data):
+    """Écriture atomique : fichier temporaire puis remplacement."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def safe_name(counter_name):
+    """Nom de compteur utilisable comme nom de fichier."""
+    return counter_name.replace(" ", "_").replace("/", "-")
+
+
+def start_run(mode):
+    """Nouveau run (dossier créé, manifeste vide) : {"run_id", "mode", ..., "models": {}}."""
+    now = datetime.now(timezone.utc)
+    run_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+    (_runs_dir() / run_id).mkdir(parents=True, exist_ok=True)
+    return {
+        "run_id": run_id,
+        "mode": mode,
+        "created_at": now.isoformat(),
+        "format": MODEL_FORMAT,
+        "xgboost_version": xgb.__version__,
+        "models": {},
+    }
+
+
+def save_booster(model, counter_name, run_id):
+    """
+    Écrit le booster au format natif dans le dossier du run, limité aux arbres retenus
+    (cf. trainer.n_trees : sans les arbres construits après best_iteration).
+    Retourne son chemin relatif à runs/.
+    """
+    file = f"{run_id}/{safe_name(counter_name)}.{MODEL_FORMAT}"
+    model.get_booster()[:trainer.n_trees(model)].save_model(_runs_dir() / file)
+    return file
+
+
+def add_model(run, counter_name, file, features, trees, metrics, watermark=None, params=None):
+    """
+    Ajoute l'entrée d'un modèle au manifeste du run (en mémoire, cf. `finish_run`).
+    `watermark` : fin des données d'entraînement ; `params` : hyperparamètres réglés (None = défaut).
+    """
+    run["models"][counter_name] = {
+        "file": file,
+        "features": list(features),
+        "trees": int(trees),
+        "metrics": metrics,
+        "watermark": watermark,
+        "params": params,
+    }
+
+
+def finish_run(run, promote_run=True):
+    """
+    Écrit le manifeste du run (modèles du run courant non ré-entraînés inclus)
+    et, par défaut, le promeut. Retourne le manifeste.
+    """
+    current = load_manifest()
+    manifest = {**run, "models": {**(current["models"] if current else {}), **run["models"]}}
+    _write_json(_runs_dir() / run["run_id"] / MANIFEST_FILE, manifest)
+    if promote_run:
+        promote(run["run_id"])
+    return manifest
+
+
+def promote(run_id):
+    """Fait de `run_id` le run servi (remplacement atomique de current.json)."""
+    # Comparé à la liste des runs, pas utilisé tel quel dans un chemin (valeur venue de l'API)
+    if run_id not in list_runs():
+        raise ValueError(f"Run inconnu ou incomplet : {run_id}")
+    _write_json(ARTIFACTS_DIR / CURRENT_FILE, {
+        "run_id": run_id,
+        "promoted_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+
+def list_runs():
+    """run_id des runs complets (avec manifeste), du plus ancien au plus récent."""
+    if not _runs_dir().exists():
+        return []
+    return sorted(p.parent.name for p in _runs_dir().glob(f"*/{MANIFEST_FILE}"))
+
+
+def current_run_id():
+    path = ARTIFACTS_DIR / CURRENT_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["run_id"]
+
+
+def load_manifest(run_id=None):
+    """Manifeste d'un run (par défaut le run courant), None s'il n'y en a pas."""
+    run_id = run_id or current_run_id()
+    if run_id is None:
+        return None
+    return json.loads((_runs_dir() / run_id / MANIFEST_FILE).read_text())
+
+
+def model_file(counter_name, manifest=None):
+    """Chemin du fichier d'un modèle dans le run courant (ou `manifest`), None s'il n'y figure pas."""
+    manifest = manifest or load_manifest()
+    if manifest is None or counter_name not in manifest["models"]:
+        return None
+    return _runs_dir() / manifest["models"][counter_name]["file"]
+
+
+def load_current():
+    """
+    Run courant en un appel : (manifeste, {compteur: xgb.Booster}).
+    Sans run promu : (None, {}).
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return None, {}
+    boosters = {
+        name: xgb.Booster(model_file=_runs_dir() / entry["file"])
+        for name, entry in manifest["models"].items()
+    }
+    return manifest, boosters
+
+
+def predict(booster, entry, df):
+    """Prédiction d'un booster du registre : features et nombre d'arbres lus dans son entrée du manifeste."""
+    return booster.inplace_predict(df[entry["features"]], iteration_range=(0, entry["trees"]))
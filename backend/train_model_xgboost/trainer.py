@@ -1,31 +1,77 @@
 # train_model_xgboost/trainer.py
 import xgboost as xgb
 
-def train_model(X_train, y_train):
-    """Entraîne un régresseur XGBoost."""
-    
+from train_model_xgboost.config import INCREMENTAL_ROUNDS, MAX_BIN
+
+# Hyperparamètres réglables (cf. tuner.py), remplacés par ceux réglés pour le compteur s'il y en a
+DEFAULT_PARAMS = {
+    "learning_rate": 0.05,  # Vitesse d'apprentissage (plus petit = plus précis mais lent)
+    "max_depth": 5,         # Complexité de l'arbre
+}
+
+# Métrique de validation de l'early stopping, la même que le score du réglage (tuner.py)
+# et que l'évaluation (MAE) : un réglage "meilleur" l'est pour ce que l'entraînement optimise
+EVAL_METRIC = "mae"
+
+def _regressor(n_estimators, has_validation, n_jobs, params=None):
     # Configuration "Standard Robuste" pour séries temporelles
-    model = xgb.XGBRegressor(
-        n_estimators=1000,      # Nombre d'arbres
-        learning_rate=0.05,     # Vitesse d'apprentissage (plus petit = plus précis mais lent)
-        max_depth=5,            # Complexité de l'arbre
-        early_stopping_rounds=50, # Arrête si ça ne s'améliore plus
+    return xgb.XGBRegressor(
+        n_estimators=n_estimators, # Nombre d'arbres (maximum)
+        tree_method='hist',     # Histogrammes : features découpées en MAX_BIN classes
+        max_bin=MAX_BIN,
+        enable_categorical=True, # Colonne 'name' (category) du modèle global
+        early_stopping_rounds=50 if has_validation else None, # Arrête si la validation ne s'améliore plus
+        eval_metric=EVAL_METRIC,
         objective='reg:squarederror',
-        n_jobs=-1               # Utilise tous les coeurs CPU
+        n_jobs=n_jobs,          # Threads CPU (cf. pipeline_train.thread_budget)
+        **{**DEFAULT_PARAMS, **(params or {})}
     )
 
-    # On utilise une partie du train comme validation interne pour le early_stopping
-    # (XGBoost a besoin de savoir quand s'arrêter)
-    eval_set = [(X_train, y_train)]
-    
+def train_model(X_train, y_train, n_jobs=-1, X_val=None, y_val=None, params=None):
+    """
+    Entraîne un régresseur XGBoost (`n_jobs` threads, -1 = tous les coeurs).
+    L'early stopping surveille (X_val, y_val), la fenêtre qui suit le train dans le temps ;
+    sans validation, les 1000 arbres sont construits.
+    `params` : hyperparamètres réglés (cf. tuner.py), à la place de DEFAULT_PARAMS.
+    """
+    has_validation = X_val is not None and len(X_val) > 0
+    model = _regressor(1000, has_validation, n_jobs, params)
+
+    # Validation = jours les plus récents avant le test (cf. loader.split_features) :
+    # l'erreur y remonte quand le modèle sur-apprend, contrairement à celle du train
+    eval_set = [(X_val, y_val)] if has_validation else None
+
     model.fit(
         X_train, y_train,
         eval_set=eval_set,
         verbose=False
     )
-    
+
     return model
 
+def continue_training(model, X_new, y_new, n_jobs=-1, X_val=None, y_val=None, max_rounds=INCREMENTAL_ROUNDS,
+                      params=None):
+    """
+    Reprend le boosting d'un modèle existant sur les nouvelles lignes seulement :
+    au plus `max_rounds` arbres ajoutés aux arbres retenus (cf. `n_trees`), même early stopping.
+    """
+    has_validation = X_val is not None and len(X_val) > 0
+    booster = model.get_booster()[:n_trees(model)] # Arbres au-delà de best_iteration écartés
+
+    top_up = _regressor(max_rounds, has_validation, n_jobs, params)
+    top_up.fit(
+        X_new, y_new,
+        eval_set=[(X_val, y_val)] if has_validation else None,
+        xgb_model=booster,
+        verbose=False
+    )
+    return top_up
+
+def n_trees(model):
+    """Nombre d'arbres réellement utilisés (meilleure itération + 1 après early stopping)."""
+    best = getattr(model, "best_iteration", None)
+    return best + 1 if best is not None else model.get_booster().num_boosted_rounds()
+
 def make_predictions(model, X_test):
     """Prédiction simple."""
-    return model.predict(X_test)
\ No newline at end of file
+    return model.predict(X_test)
@@ -0,0 +1,219 @@
+# train_model_xgboost/tuner.py
+"""
+Réglage des hyperparamètres des modèles par compteur, par successive halving :
+TUNING_CANDIDATES configurations tirées au hasard reçoivent TUNING_MIN_ROUNDS arbres,
+seul le meilleur tiers (1/TUNING_ETA) continue avec TUNING_ETA fois plus d'arbres, etc.
+Les survivants reprennent leur booster au lieu de repartir de zéro.
+
+Score = MAE sur la fenêtre de validation (cf. loader.split_features), le test reste intact ;
+c'est aussi la métrique de l'early stopping de l'entraînement (trainer.EVAL_METRIC).
+Le gagnant n'est retenu que s'il bat trainer.DEFAULT_PARAMS entraîné jusqu'à l'early stopping :
+à 50 arbres, les paramètres par défaut (learning_rate faible) sont souvent éliminés trop tôt.
+Un compteur par tâche sur un pool de processus (cf. pipeline_train.thread_budget), CPU seul.
+Le meilleur réglage est écrit à côté du modèle (saver.params_path) et repris par pipeline_train.
+"""
+import logging
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from train_model_xgboost import loader, saver, trainer
+from train_model_xgboost.config import (MAX_BIN, TRAIN_WORKERS, TUNING_CANDIDATES, TUNING_ETA,
+                                        TUNING_MIN_ROUNDS, VALIDATION_DAYS)
+from train_model_xgboost.pipeline_train import thread_budget
+
+logger = logging.getLogger()
+
+# Espace de recherche : (min, max), échelle log pour learning_rate, entiers pour max_depth / min_child_weight
+SEARCH_SPACE = {
+    "learning_rate": (0.01, 0.3),
+    "max_depth": (3, 10),
+    "min_child_weight": (1, 20),
+    "subsample": (0.5, 1.0),
+    "colsample_bytree": (0.5, 1.0),
+    "reg_lambda": (0.1, 10.0),
+}
+
+# Nombre d'arbres maximum (comme trainer.train_model)
+MAX_ROUNDS = 1000
+
+# Dataset partagé avec les processus de réglage (hérité au fork)
+_WORKER = {}
+
+
+def sample_candidates(n_candidates, seed=0):
+    """`n_candidates` configurations : trainer.DEFAULT_PARAMS en premier, puis tirages dans SEARCH_SPACE."""
+    rng = np.random.default_rng(seed)
+    candidates = [dict(trainer.DEFAULT_PARAMS)]
+    for _ in range(n_candidates - 1):
+        low, high = SEARCH_SPACE["learning_rate"]
+        candidate = {"learning_rate": float(np.exp(rng.uniform(np.log(low), np.log(high))))}
+        for key in ("max_depth", "min_child_weight"):
+            low, high = SEARCH_SPACE[key]
+            candidate[key] = int(rng.integers(low, high + 1))
+        for key in ("subsample", "colsample_bytree", "reg_lambda"):
+            low, high = SEARCH_SPACE[key]
+            candidate[key] = float(rng.uniform(low, high))
+        candidates.append(candidate)
+    return candidates
+
+
+def _base_params(n_jobs):
+    return {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "device": "cpu",
+        "max_bin": MAX_BIN,
+        "eval_metric": trainer.EVAL_METRIC,
+        "nthread": n_jobs,
+    }
+
+
+def successive_halving(dtrain, dval, candidates, n_jobs=-1, min_rounds=TUNING_MIN_ROUNDS, eta=TUNING_ETA):
+    """
+    Successive halving sur des matrices déjà construites (`dtrain`, `dval` : réutilisées par
+    tous les candidats et tous les tours). Retourne {"params", "val_mae", "rounds", "evaluated"}.
+    """
+    base = _base_params(n_jobs)
+    boosters = [None] * len(candidates)
+    history = [[] for _ in candidates]  # MAE de validation après chaque arbre
+    alive = list(range(len(candidates)))
+    done, budget = 0, min(min_rounds, MAX_ROUNDS)
+
+    while True:
+        for i in alive:
+            evals_result = {}
+            boosters[i] = xgb.train(
+                {**base, **candidates[i]}, dtrain, num_boost_round=budget - done,
+                evals=[(dval, "val")], evals_result=evals_result, xgb_model=boosters[i], verbose_eval=False,
+            )
+            history[i].extend(evals_result["val"][trainer.EVAL_METRIC])
+
+        # Score = meilleure MAE atteinte (ce que l'early stopping retiendrait)
+        alive.sort(key=lambda i: min(history[i]))
+        alive = alive[:max(1, len(alive) // eta)]
+        if len(alive) == 1 or budget >= MAX_ROUNDS:
+            break
+        done, budget = budget, min(budget * eta, MAX_ROUNDS)
+
+    best = alive[0]
+    return {
+        "params": candidates[best],
+        "val_mae": round(float(min(history[best])), 2),
+        "rounds": int(np.argmin(history[best])) + 1,
+        "evaluated": len(candidates),
+    }
+
+
+def default_score(dtrain, dval, n_jobs=-1):
+    """(MAE de validation, arbres) de trainer.DEFAULT_PARAMS avec early stopping, comme trainer.train_model."""
+    evals_result = {}
+    xgb.train(
+        {**_base_params(n_jobs), **trainer.DEFAULT_PARAMS}, dtrain, num_boost_round=MAX_ROUNDS,
+        evals=[(dval, "val")], evals_result=evals_result, early_stopping_rounds=50, verbose_eval=False,
+    )
+    history = evals_result["val"][trainer.EVAL_METRIC]
+    return round(float(min(history)), 2), int(np.argmin(history)) + 1
+
+
+def select_params(dtrain, dval, candidates, n_jobs=-1):
+    """
+    Successive halving puis comparaison aux paramètres par défaut. Retourne le résultat de
+    `successive_halving` complété de "default_val_mae" et "beats_default" ; si le gagnant ne
+    fait pas strictement mieux, "params" / "val_mae" / "rounds" sont ceux des paramètres par défaut.
+    """
+    best = successive_halving(dtrain, dval, candidates, n_jobs)
+    default_mae, default_rounds = default_score(dtrain, dval, n_jobs)
+    best["default_val_mae"] = default_mae
+    best["beats_default"] = best["val_mae"] < default_mae
+    if not best["beats_default"]:
+        best.update(params=dict(trainer.DEFAULT_PARAMS), val_mae=default_mae, rounds=default_rounds)
+    return best
+
+
+def tune_counter(df_global, name, rows=None, n_jobs=-1, n_candidates=None, seed=0, cutoff=None):
+    """
+    Règle les hyperparamètres d'un compteur et les sauvegarde s'ils battent les paramètres
+    par défaut (sinon l'ancien réglage est supprimé). Retourne sa ligne de résultats.
+    `cutoff` : début du test (cf. loader.data_cutoff), comme pour l'entraînement.
+    """
+    X_train, y_train, _, _, _, X_val, y_val = loader.get_data_for_counter(
+        df_global, name, rows, validation_days=VALIDATION_DAYS, cutoff=cutoff
+    )
+    if X_train.empty or X_val.empty:
+        return None
+
+    start = time.perf_counter()
+    # Matrices quantifiées une seule fois : la validation réutilise les classes du train
+    dtrain = xgb.QuantileDMatrix(X_train, y_train, max_bin=MAX_BIN, enable_categorical=True, nthread=n_jobs)
+    dval = xgb.QuantileDMatrix(X_val, y_val, ref=dtrain, enable_categorical=True, nthread=n_jobs)
+
+    candidates = sample_candidates(n_candidates or TUNING_CANDIDATES, seed)
+    best = select_params(dtrain, dval, candidates, n_jobs)
+    best["tuned_at"] = datetime.now(timezone.utc).isoformat()
+    if best["beats_default"]:
+        params_file = saver.save_params(best, name)
+    else:
+        saver.delete_params(name)
+        params_file = None
+
+    elapsed = time.perf_counter() - start
+    kept = "réglé" if best["beats_default"] else "paramètres par défaut conservés"
+    logger.info(f"   🎯 {name} : MAE validation={best['val_mae']} | {best['rounds']} arbres | {kept} | {elapsed:.1f}s")
+    return {"Compteur": name, "MAE validation": best["val_mae"], "MAE défaut": best["default_val_mae"],
+            "Arbres": best["rounds"], **best["params"], "Paramètres": params_file}
+
+
+def _init_worker(df_global, groups, n_jobs, n_candidates, cutoff):
+    _WORKER.update(df=df_global, groups=groups, n_jobs=n_jobs, n_candidates=n_candidates, cutoff=cutoff)
+
+
+def _tune_in_worker(name):
+    return tune_counter(_WORKER["df"], name, _WORKER["groups"][name], _WORKER["n_jobs"],
+                        _WORKER["n_candidates"], cutoff=_WORKER["cutoff"])
+
+
+def tune_counters(df_global, n_workers=None, n_candidates=None):
+    """Règle chaque compteur, en séquentiel ou sur un pool de processus (cf. pipeline_train.train_counters)."""
+    groups = loader.counter_rows(df_global)
+    compteurs = list(groups)
+    cutoff = loader.data_cutoff(df_global)
+
+    workers, n_jobs = thread_budget(len(compteurs), TRAIN_WORKERS if n_workers is None else n_workers)
+    logger.info(f"⚙️ Réglage de {len(compteurs)} compteurs : {workers} processus × {n_jobs} threads XGBoost")
+    start = time.perf_counter()
+
+    if workers == 1:
+        results = [tune_counter(df_global, name, groups[name], n_jobs, n_candidates, cutoff=cutoff)
+                   for name in compteurs]
+    else:
+        context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(df_global, groups, n_jobs, n_candidates, cutoff)) as pool:
+            results = list(pool.map(_tune_in_worker, compteurs))
+
+    results = [r for r in results if r is not None]
+    logger.info(f"⏱️ Réglage : {time.perf_counter() - start:.1f}s ({len(results)} compteurs)")
+    return results
+
+
+def run_tuning_pipeline(n_workers: int = None, n_candidates: int = None):
+    logger.info("🚀 DÉMARRAGE DU RÉGLAGE XGBOOST (successive halving)")
+
+    df_global = loader.load_full_dataset()
+    results = tune_counters(df_global, n_workers, n_candidates)
+    if not results:
+        logger.info("⚠️ Aucun compteur réglé (données de validation insuffisantes)")
+        return results
+
+    print("\n--- RÉGLAGE XGBOOST ---")
+    print(pd.DataFrame(results).sort_values("MAE validation").to_string(index=False))
+    return results
+
+if __name__ == "__main__":
+    run_tuning_pipeline()
@@ -8,6 +8,7 @@ from .routes.calendar import router as calendar_router
 from .routes.counters_final import router as counters_final_router
 from .routes.counters_forecast import router as forecast_router
 from .routes.train_model import router as train_router
+from .routes.mirror import router as mirror_router
 
 app = FastAPI(
     title="Cyclable API",
@@ -29,6 +30,7 @@ app.include_router(calendar_router, tags=["calendar_router"])
 app.include_router(counters_final_router, tags=["counters_final_router"])
 app.include_router(forecast_router, tags=["forecast_router"])
 app.include_router(train_router, tags=["train_router"])
+app.include_router(mirror_router, tags=["mirror_router"])
 
 @app.get("/health")
 def root():
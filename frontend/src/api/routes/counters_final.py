@@ -1,13 +1,21 @@
 # routes/final_dataset.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from src.api.utils.bulk_writer import WRITE_MODE
 from src.api.routes.final_dataset.pipeline import run_final_pipeline
 
 router = APIRouter()
 
 @router.post("/run-final-dataset")
-def run_final_dataset_route():
+def run_final_dataset_route(
+    mode: str = Query(WRITE_MODE, pattern="^(insert|upsert)$", description="insert | upsert (idempotent)"),
+    full_refresh: bool = Query(False, description="Vide puis reconstruit tout counters_final (ex. changement de schéma)"),
+    memory_budget_mb: int | None = Query(None, ge=16, description="Budget mémoire d'un morceau en Mo (taille des morceaux)"),
+):
     try:
-        result = run_final_pipeline()
-        return {"status": "ok", "result": result}
+        result = run_final_pipeline(mode=mode, full_refresh=full_refresh, memory_budget_mb=memory_budget_mb)
+        if result["rows_failed"]:
+            return {"status": "error", "message": "Lignes en échec : run interrompu, à relancer",
+                    "rows_failed": result["rows_failed"], "result": result}
+        return {"status": "ok", "rows_failed": 0, "result": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -0,0 +1,119 @@
+# final_dataset/joins.py
+"""
+Jointures par indices du dataset final (compteurs × heures + météo + calendrier).
+
+Chaque ligne de la grille est repérée par (indice compteur, décalage horaire) ; les
+attributs météo sont lus par décalage horaire et ceux du calendrier par décalage en
+jours, avec `np.take` dans des tableaux préalloués. Aucune fusion pandas : le
+DataFrame final est assemblé une seule fois, colonne par colonne.
+"""
+import numpy as np
+import pandas as pd
+
+from src.api.utils.dense_grid import HOUR_NS, hour_offsets
+
+DAY_NS = 24 * HOUR_NS
+
+METEO_FEATURES = ['temperature_2m', 'precipitation', 'precipitation_class', 'is_raining', 'windspeed_10m']
+CALENDAR_FEATURES = ['jour_semaine', 'is_weekend', 'nom_jour', 'is_ferie', 'is_vacances', 'is_jour_ouvre']
+
+
+def grid_indices(n_names: int, n_hours: int, first_hours=None, stop_hours=None):
+    """
+    Indices (compteur, heure) de la grille, compteur par compteur puis heure par heure.
+    `first_hours[i]` : premier décalage horaire retenu pour le compteur i (0 par défaut).
+    `stop_hours[i]`  : décalage de fin, exclu (n_hours par défaut).
+    Retourne (codes compteur, décalages horaires, premier décalage, nombre de lignes par compteur).
+    """
+    first = np.zeros(n_names, dtype=np.int64) if first_hours is None else np.clip(first_hours, 0, n_hours)
+    stop = np.full(n_names, n_hours, dtype=np.int64) if stop_hours is None else np.clip(stop_hours, 0, n_hours)
+    lengths = np.maximum(stop - first, 0)
+    name_idx = np.repeat(np.arange(n_names, dtype=np.int32), lengths)
+    hour_idx = (np.concatenate([np.arange(f, f + n, dtype=np.int32) for f, n in zip(first, lengths)])
+                if n_names else np.zeros(0, np.int32))
+    return name_idx, hour_idx, first, lengths
+
+
+def _name_offsets(names, bounds: dict, origin, default: int) -> np.ndarray:
+    """Décalage horaire de `bounds[name]` pour chaque compteur, `default` si absent."""
+    marks = pd.Series(names).map(bounds)
+    offsets = np.full(len(names), default, dtype=np.int64)
+    known = marks.notna().to_numpy()
+    if known.any():
+        offsets[known] = hour_offsets(pd.to_datetime(marks[known], utc=True), origin)
+    return offsets
+
+
+def _lookup(values: pd.Series, offsets: np.ndarray, size: int, default=0) -> np.ndarray:
+    """Tableau de taille `size` indexé par décalage, `default` là où la source n'a pas de valeur."""
+    if values.dtype.kind in "biuf":
+        out = np.full(size, default, dtype=values.dtype)
+    else:
+        out = np.full(size, default, dtype=object)
+    keep = (offsets >= 0) & (offsets < size)
+    source = values.to_numpy()[keep]
+    if values.dtype.kind == "f":
+        source = np.where(np.isnan(source), default, source)
+    out[offsets[keep]] = source
+    return out
+
+
+def build_final_frame(df_velo: pd.DataFrame, df_meteo: pd.DataFrame, df_cal: pd.DataFrame,
+                      start, end, watermarks: dict = None, ends: dict = None) -> pd.DataFrame:
+    """
+    Dataset final sur la plage horaire [start, end] (UTC).
+
+    - df_velo  : name, timestamp (UTC), intensity, latitude, longitude
+    - df_meteo : timestamp (UTC) + METEO_FEATURES
+    - df_cal   : date + CALENDAR_FEATURES (un jour UTC par ligne)
+    - watermarks : {name: timestamp} ; seules les heures strictement postérieures sont produites.
+    - ends       : {name: timestamp} ; dernière heure produite pour le compteur (incluse).
+
+    Valeurs manquantes : 0 (intensité, météo, calendrier), comme les anciens fillna(0).
+    """
+    hours = pd.date_range(start, end, freq='h', tz='UTC')
+    n_hours = len(hours)
+    names = np.asarray(df_velo['name'].unique())
+    origin = hours[0]
+
+    # Grille (compteur, heure), éventuellement bornée par compteur (watermark, dernière heure)
+    first_hours = _name_offsets(names, watermarks, origin, -1) + 1 if watermarks else None
+    stop_hours = _name_offsets(names, ends, origin, n_hours - 1) + 1 if ends else None
+    name_idx, hour_idx, first, lengths = grid_indices(len(names), n_hours, first_hours, stop_hours)
+
+    # Intensités : matrice dense compteurs × heures remplie par indices,
+    # puis tronçons [premier décalage, premier décalage + longueur[ de chaque ligne mis bout à bout
+    rows = pd.Index(names).get_indexer(df_velo['name'])
+    cols = hour_offsets(df_velo['timestamp'], origin)
+    keep = (cols >= 0) & (cols < n_hours)
+    intensity = np.zeros((len(names), n_hours))
+    intensity[rows[keep], cols[keep]] = np.nan_to_num(df_velo['intensity'].to_numpy(dtype=float)[keep])
+
+    coords = df_velo.groupby('name', sort=False, observed=True)[['latitude', 'longitude']].first().reindex(names)
+
+    columns = {
+        'name': pd.Categorical.from_codes(name_idx, categories=names),
+        'timestamp': hours.take(hour_idx),
+        'intensity': np.concatenate([intensity[i, f:f + n] for i, (f, n) in enumerate(zip(first, lengths))]),
+        'latitude': np.repeat(coords['latitude'].to_numpy(), lengths),
+        'longitude': np.repeat(coords['longitude'].to_numpy(), lengths),
+    }
+
+    # Météo : un tableau par attribut, indexé par décalage horaire
+    meteo_offsets = hour_offsets(df_meteo['timestamp'], origin)
+    for col in METEO_FEATURES:
+        if col in df_meteo.columns:
+            columns[col] = np.take(_lookup(df_meteo[col], meteo_offsets, n_hours), hour_idx)
+
+    # Calendrier : un tableau par attribut, indexé par décalage en jours (date UTC),
+    # ramené à l'axe horaire avant le `take` sur la grille
+    day0 = origin.normalize()
+    hour_days = (origin.hour + np.arange(n_hours)) // 24
+    n_days = int(hour_days[-1]) + 1 if n_hours else 0
+    cal_dates = pd.to_datetime(df_cal['date']).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    cal_offsets = (cal_dates - day0.value) // DAY_NS
+    for col in CALENDAR_FEATURES:
+        if col in df_cal.columns:
+            columns[col] = np.take(_lookup(df_cal[col], cal_offsets, n_days)[hour_days], hour_idx)
+
+    return pd.DataFrame(columns, copy=False)
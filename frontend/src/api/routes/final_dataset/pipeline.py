@@ -1,96 +1,167 @@
 # final_dataset/pipeline.py
+import os
+
 import pandas as pd
-from src.api.utils.supabase_client import supabase
+from src.api.utils.supabase_reader import (
+    TS_FORMAT, fetch_table, fetch_table_parallel, latest_by_name, list_distinct, month_partitions, time_bounds,
+)
+from src.api.utils.bulk_writer import WRITE_MODE, WriteReport, bulk_write
+from src.api.utils.supabase_client import get_client
+from src.api.routes.final_dataset.joins import build_final_frame
+from src.api.utils.schema import apply_schema
 from datetime import datetime, timezone
 
 FINAL_TABLE = "counters_final"
 
-def run_final_pipeline():
-    print("--- Démarrage de l'agrégation finale ---")
+VELO_COLUMNS = ['name', 'timestamp', 'intensity', 'latitude', 'longitude']
+METEO_COLUMNS = ['time', 'temperature_2m', 'precipitation', 'precipitation_class', 'is_raining', 'windspeed_10m']
+CALENDAR_COLUMNS = ['date', 'jour_semaine', 'is_weekend', 'nom_jour', 'is_ferie', 'is_vacances', 'is_jour_ouvre']
+
+# Budget mémoire d'un morceau (grille + jointures + sérialisation + écriture), en Mo
+MEMORY_BUDGET_MB = int(os.getenv("FINAL_MEMORY_BUDGET_MB", "512"))
+
+# Coût mémoire estimé d'une ligne de counters_final pendant le traitement d'un morceau :
+# DataFrame final, copie pour l'écriture (timestamps en chaînes) et lots JSON en cours
+# d'envoi, plus la lecture de counters_clean (JSON de l'API, qui domine)
+ROW_BYTES = 1000
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def plan_chunks(names: list, range_start, range_end, memory_budget_mb: int = MEMORY_BUDGET_MB,
+                row_bytes: int = ROW_BYTES) -> list:
+    """
+    Découpe la plage [range_start, range_end] × `names` en morceaux tenant dans le budget.
+
+    - Par défaut, tous les compteurs sur une fenêtre de N jours entiers (UTC),
+      N = budget / (compteurs × 24 h × row_bytes).
+    - Si un seul jour de tous les compteurs dépasse le budget : blocs de compteurs, jour par jour.
+
+    Retourne [(compteurs, début, fin incluse), ...] dans l'ordre chronologique.
+    """
+    budget = memory_budget_mb * 1024 ** 2
+    rows_per_day = max(1, len(names)) * 24
+    range_days = (range_end.normalize() - range_start.normalize()).days + 1
+    chunk_days = min(budget // (rows_per_day * row_bytes), range_days)
+    if chunk_days >= 1:
+        blocks = [list(names)]
+    else:
+        chunk_days = 1
+        block_size = max(1, budget // (24 * row_bytes))
+        blocks = [list(names[i:i + block_size]) for i in range(0, len(names), block_size)]
+
+    chunks = []
+    window_start = range_start.normalize()
+    while window_start <= range_end:
+        window_end = window_start + pd.Timedelta(days=chunk_days)
+        start = max(window_start, range_start)
+        end = min(window_end - pd.Timedelta(hours=1), range_end)
+        chunks.extend((block, start, end) for block in blocks)
+        window_start = window_end
+    return chunks
+
+
+def clear_final_table(client=None) -> int:
+    """
+    Vide counters_final avant une reconstruction complète, un DELETE par compteur
+    (requêtes courtes). Retourne le nombre de compteurs supprimés.
+    """
+    client = client or get_client()
+    names = list_distinct(FINAL_TABLE, "name", client=client)
+    for name in names:
+        client.table(FINAL_TABLE).delete().eq("name", name).execute()
+    return len(names)
+
+
+def rollback_chunk(block, starts: dict, chunk_start, chunk_end, client=None):
+    """
+    Supprime les lignes de `block` écrites par ce run dans le morceau [chunk_start, chunk_end]
+    (après le point de départ de chaque compteur, cf. `starts`) : le watermark de chaque
+    compteur revient avant le morceau, recalculé en entier au run suivant.
+    """
+    client = client or get_client()
+    for name in block:
+        if name not in starts:
+            continue
+        after = max(starts[name], chunk_start - pd.Timedelta(hours=1))
+        (client.table(FINAL_TABLE).delete().eq("name", name)
+         .gt("timestamp", after.strftime(TS_FORMAT)).lte("timestamp", chunk_end.strftime(TS_FORMAT)).execute())
+
+
+def run_final_pipeline(mode: str = WRITE_MODE, full_refresh: bool = False, memory_budget_mb: int = None):
+    """
+    Construit counters_final (compteurs × heures + météo + calendrier).
+
+    Par défaut, incrémental : seules les heures postérieures au dernier timestamp déjà
+    présent dans counters_final pour chaque compteur sont calculées et ajoutées ; météo
+    et calendrier sont lus sur cette seule plage. `full_refresh=True` reconstruit tout
+    l'historique (ex. après un changement de schéma) : counters_final est d'abord vidé,
+    sans quoi le mode insert ajouterait une seconde copie de la table.
+
+    Le traitement se fait par morceaux (fenêtre de jours ou bloc de compteurs, cf.
+    `plan_chunks`) dimensionnés par `memory_budget_mb` : chaque morceau est lu, joint,
+    sérialisé et écrit, puis libéré avant le suivant. Seules météo et calendrier (une
+    ligne par heure / par jour) sont gardés pour toute la plage.
+
+    Le point de reprise est le dernier timestamp écrit par compteur : un lot en échec
+    laisserait derrière lui un trou jamais rattrapé. Au premier morceau avec des lignes en
+    échec, ses lignes sont retirées (cf. `rollback_chunk`) et le run s'arrête ; le résultat
+    indique `rows_failed`.
+    """
+    memory_budget_mb = memory_budget_mb or MEMORY_BUDGET_MB
+    print(f"--- Démarrage de l'agrégation finale ({'complète' if full_refresh else 'incrémentale'}) ---")
 
     # ---------------------------------------------------------
-    # 1. CHARGEMENT DES DONNÉES DE SUPABASE
+    # 1. PLAGE À CONSTRUIRE (bornes seulement, sans charger counters_clean)
     # ---------------------------------------------------------
-    print("1. Chargement des données depuis Supabase...")
-
-    def fetch_all(table_name: str):
-        """Récupère toutes les lignes d'une table Supabase en paginant par 1000."""
-        all_rows = []
-        offset = 0
-        limit = 1000
-        while True:
-            resp = supabase.table(table_name).select("*").range(offset, offset + limit - 1).execute()
-            rows = resp.data
-            if not rows:
-                break
-            all_rows.extend(rows)
-            offset += limit
-        return pd.DataFrame(all_rows)
-
-    # A. Compteurs vélos
-    df_velo = fetch_all("counters_clean")
-    df_velo['timestamp'] = pd.to_datetime(df_velo['timestamp'], utc=True)
-    print(f"   - Vélos      : {len(df_velo)} lignes ({df_velo['name'].nunique()} compteurs)")
-
-    # B. Météo historique
-    df_meteo = fetch_all("meteo_history")
-    df_meteo['timestamp'] = pd.to_datetime(df_meteo['time'], utc=True)
-    df_meteo = df_meteo.drop(columns=['time'], errors='ignore')
+    print("1. Bornes des données depuis Supabase...")
+
+    names = list_distinct("counters_clean", "name")
+    watermarks = {} if full_refresh else {
+        name: _utc(ts) for name, ts in latest_by_name(FINAL_TABLE, names).items()
+    }
+    last_clean = {name: _utc(ts) for name, ts in latest_by_name("counters_clean", names).items()}
+
+    # Compteurs ayant des heures au-delà de leur watermark
+    pending = [name for name in names if name in last_clean
+               and (name not in watermarks or last_clean[name] > watermarks[name])]
+    if not pending:
+        print("\n✅ counters_final déjà à jour.")
+        return {"rows_final": 0, "rows_failed": 0, "write": None}
+
+    # Plage horaire : du plus ancien point de reprise au dernier relevé
+    starts = [watermarks[name] + pd.Timedelta(hours=1) for name in pending if name in watermarks]
+    new_names = [name for name in pending if name not in watermarks]
+    if new_names:
+        first, _ = time_bounds("counters_clean", filters=[("in_", "name", new_names)])
+        starts.append(_utc(first))
+    range_start = min(starts)
+    range_end = max(last_clean[name] for name in pending)
+    print(f"   - Vélos      : {len(pending)} compteurs, {range_start} -> {range_end}")
+
+    # Météo historique (même plage)
+    meteo_filters = [("gte", "time", range_start.strftime(TS_FORMAT)), ("lte", "time", range_end.strftime(TS_FORMAT))]
+    df_meteo = fetch_table_parallel(
+        "meteo_history", month_partitions("meteo_history", time_column='time', filters=meteo_filters),
+        columns=METEO_COLUMNS, keys=("time",), filters=meteo_filters, parse_dates=['time']
+    )
+    df_meteo = apply_schema(df_meteo.rename(columns={'time': 'timestamp'}))
     print(f"   - Météo      : {len(df_meteo)} lignes")
 
-    # C. Calendrier
-    df_cal = fetch_all("calendar")
+    # Calendrier (jours couverts par la plage)
+    df_cal = fetch_table(
+        "calendar", columns=CALENDAR_COLUMNS, keys=("date",),
+        filters=[("gte", "date", range_start.strftime("%Y-%m-%d")), ("lte", "date", range_end.strftime("%Y-%m-%d"))]
+    )
     df_cal['date'] = pd.to_datetime(df_cal['date'])
+    apply_schema(df_cal)
     print(f"   - Calendrier : {len(df_cal)} jours")
 
-    # ---------------------------------------------------------
-    # 2. FULL HOURLY GRID
-    # ---------------------------------------------------------
-    print("\n2. Création du full hourly grid pour tous les compteurs...")
-
-    compteur_names = df_velo['name'].unique()
-    full_time_range = pd.date_range(df_velo['timestamp'].min(), df_velo['timestamp'].max(), freq='h', tz='UTC')
-
-    df_grid = pd.MultiIndex.from_product([compteur_names, full_time_range], names=['name', 'timestamp']).to_frame(index=False)
-
-    coords = df_velo.groupby('name')[['latitude', 'longitude']].first().reset_index()
-    df_grid = df_grid.merge(coords, on='name', how='left')
-
-    df_grid = df_grid.merge(df_velo[['name','timestamp','intensity']], on=['name','timestamp'], how='left')
-    df_grid['intensity'] = df_grid['intensity'].fillna(0) 
-
-    print(f"   - Total lignes grid : {len(df_grid)}")
-
-    # ---------------------------------------------------------
-    # 3. FUSION MÉTÉO
-    # ---------------------------------------------------------
-    print("\n3. Fusion Météo (Hourly join)...")
-    df_merged = pd.merge(df_grid, df_meteo, on='timestamp', how='left')
-
-    for col in ['temperature_2m','precipitation','precipitation_class','is_raining','windspeed_10m']:
-        if col in df_merged.columns:
-            df_merged[col] = df_merged[col].fillna(0)
-
-    print(f"Après merge météo : {len(df_merged)}")
-
-    # ---------------------------------------------------------
-    # 4. FUSION CALENDRIER
-    # ---------------------------------------------------------
-    print("4. Fusion Calendrier (Daily join)...")
-    df_merged['date_join'] = df_merged['timestamp'].dt.tz_convert(None).dt.normalize()
-    df_final = pd.merge(df_merged, df_cal, left_on='date_join', right_on='date', how='left')
-    df_final = df_final.drop(columns=['date_join','date'])
-
-    for col in ['jour_semaine','is_weekend','nom_jour','is_ferie','is_vacances','is_jour_ouvre']:
-        if col in df_final.columns:
-            df_final[col] = df_final[col].fillna(0)
-
-    print(f"Après merge calendrier : {len(df_final)}")
-
-    # ---------------------------------------------------------
-    # 5. INSERTION DANS SUPABASE
-    # ---------------------------------------------------------
-    print("\n5. Insertion dans Supabase (counters_final)...")
+    chunks = plan_chunks(pending, range_start, range_end, memory_budget_mb)
+    print(f"   - Morceaux   : {len(chunks)} (budget {memory_budget_mb} Mo)")
 
     columns_needed = [
         'name', 'timestamp', 'intensity', 'latitude', 'longitude',
@@ -98,25 +169,68 @@ def run_final_pipeline():
         'jour_semaine', 'is_weekend', 'nom_jour', 'is_ferie',
         'is_vacances', 'is_jour_ouvre', 'created_at'
     ]
-
-    if 'created_at' not in df_final.columns:
-        df_final['created_at'] = datetime.now(timezone.utc)
-
-    df_final_to_insert = df_final[columns_needed].copy()
-
-    for col in df_final_to_insert.select_dtypes(include=["datetime64[ns, UTC]", "datetime64[ns]"]).columns:
-        df_final_to_insert[col] = df_final_to_insert[col].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-
-    records = df_final_to_insert.to_dict(orient="records")
-    chunk_size = 500
-
-    for i in range(0, len(records), chunk_size):
-        chunk = records[i:i+chunk_size]
-        try:
-            supabase.table(FINAL_TABLE).insert(chunk).execute()
-            print(f"   ✔ {len(chunk)} lignes insérées")
-        except Exception as e:
-            print(f"   ❌ Erreur lors de l'insertion : {e}")
-
-    print(f"\n✅ Pipeline final terminé. Total lignes : {len(df_final)}")
-    return {"rows_final": len(df_final)}
+    # Bornes de la grille par compteur : (point de départ exclu, dernière heure incluse).
+    # Un nouveau compteur démarre à son premier relevé, lu dans le morceau où il apparaît :
+    # le résultat ne dépend ni du découpage ni du mode (incrémental / complet).
+    starts = dict(watermarks)
+    created_at = datetime.now(timezone.utc)
+    report = WriteReport(FINAL_TABLE)
+    total_rows = 0
+
+    if full_refresh:
+        print(f"\n🧹 Reconstruction complète : {clear_final_table()} compteurs supprimés de {FINAL_TABLE}")
+
+    for i, (block, chunk_start, chunk_end) in enumerate(chunks, start=1):
+        print(f"\n[{i}/{len(chunks)}] {len(block)} compteurs, {chunk_start} -> {chunk_end}")
+
+        # ---------------------------------------------------------
+        # 2. COMPTEURS VÉLOS DU MORCEAU (au-delà du watermark de chaque compteur)
+        # ---------------------------------------------------------
+        partitions = []
+        for name in block:
+            part_filters = [("eq", "name", name)]
+            if name in watermarks:
+                if watermarks[name] >= chunk_end:
+                    continue
+                part_filters.append(("gt", "timestamp", watermarks[name].strftime(TS_FORMAT)))
+            partitions.append((name, part_filters))
+        df_velo = fetch_table_parallel(
+            "counters_clean", partitions, columns=VELO_COLUMNS, parse_dates=['timestamp'],
+            filters=[("gte", "timestamp", chunk_start.strftime(TS_FORMAT)),
+                     ("lte", "timestamp", chunk_end.strftime(TS_FORMAT))],
+        )
+        if df_velo.empty:
+            continue
+        apply_schema(df_velo)
+        first_seen = df_velo.groupby('name', observed=True)['timestamp'].min()
+        for name, ts in first_seen.items():
+            starts.setdefault(name, ts - pd.Timedelta(hours=1))
+
+        # ---------------------------------------------------------
+        # 3-4. GRID + FUSION MÉTÉO / CALENDRIER (jointures par indices)
+        # ---------------------------------------------------------
+        # Uniquement les couples (name, heure) entre le point de départ et le dernier relevé du compteur
+        df_final = build_final_frame(df_velo, df_meteo, df_cal, chunk_start, chunk_end,
+                                     watermarks=starts, ends=last_clean)
+        del df_velo
+        apply_schema(df_final, label=FINAL_TABLE)
+
+        # ---------------------------------------------------------
+        # 5. INSERTION DANS SUPABASE
+        # ---------------------------------------------------------
+        # Timestamps formatés et lots encodés en JSON par bulk_write (cf. serialization)
+        df_final['created_at'] = created_at
+        chunk_report = bulk_write(FINAL_TABLE, df_final[columns_needed], mode=mode)
+        report.merge(chunk_report)
+        if chunk_report.rows_failed:
+            rollback_chunk(block, starts, chunk_start, chunk_end)
+            print(f"\n❌ {chunk_report.rows_failed} lignes en échec : morceau {i} retiré, run interrompu "
+                  f"(reprise au prochain run)")
+            break
+        total_rows += len(df_final)
+        del df_final
+
+    status = "⚠️ Pipeline final interrompu" if report.rows_failed else "✅ Pipeline final terminé"
+    print(f"\n{status}. Total lignes : {total_rows}")
+    print(f"   {report}")
+    return {"rows_final": total_rows, "rows_failed": report.rows_failed, "write": report.as_dict()}
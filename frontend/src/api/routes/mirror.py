@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Query
+from src.api.utils.parquet_mirror import MIRROR_TABLES, sync_table
+
+router = APIRouter()
+
+@router.post("/mirror/sync")
+def sync_mirror_route(
+    full: bool = Query(False, description="Rebuild the whole mirror (use after a full_refresh rebuild of counters_clean / counters_final)"),
+):
+    try:
+        result = {table: sync_table(table, full=full) for table in MIRROR_TABLES}
+        return {"status": "ok", "rows_added": result}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
@@ -1,21 +1,27 @@
 # src/api/routes/pipeline_xgboost.py
-from fastapi import APIRouter
-from train_model_xgboost import pipeline_train
+from fastapi import APIRouter, Query
+from train_model_xgboost import pipeline_train, registry, tuner
 import pandas as pd
 
 router = APIRouter()
 
 @router.post("/pipeline/xgboost/run")
-async def run_xgboost_pipeline_route():
+async def run_xgboost_pipeline_route(
+    workers: int | None = Query(None, ge=1, description="Training processes (default: XGBOOST_TRAIN_WORKERS, 1 = sequential)"),
+    mode: str | None = Query(None, pattern="^(per_counter|global)$", description="per_counter | global (default: XGBOOST_MODEL_MODE)"),
+    incremental: bool = Query(False, description="Continue boosting the saved models on newly arrived rows instead of retraining from scratch"),
+    promote: bool = Query(True, description="Serve the new registry run right away (otherwise promote it later)"),
+):
     """
     Trigger the full XGBoost pipeline:
     - Load dataset
-    - Train models for each counter
+    - Train models for each counter (optionally on a process pool), or a single global model
+      (incremental: top-up of the saved models, full retrain if validation error degrades)
     - Evaluate
-    - Save models and metrics
+    - Save models (new registry run, promoted to current by default) and metrics
     """
     try:
-        pipeline_train.run_xgboost_pipeline()
+        pipeline_train.run_xgboost_pipeline(n_workers=workers, mode=mode, incremental=incremental, promote=promote)
 
         return {
             "status": "ok",
@@ -26,3 +32,51 @@ async def run_xgboost_pipeline_route():
             "status": "error",
             "message": str(e)
         }
+
+
+@router.post("/pipeline/xgboost/tune")
+async def run_xgboost_tuning_route(
+    workers: int | None = Query(None, ge=1, description="Tuning processes (default: XGBOOST_TRAIN_WORKERS, 1 = sequential)"),
+    candidates: int | None = Query(None, ge=1, description="Random configurations per counter (default: XGBOOST_TUNING_CANDIDATES)"),
+):
+    """
+    Tune the per-counter hyperparameters by successive halving on the validation window.
+    The best configuration is saved next to each model and reused by /pipeline/xgboost/run.
+    """
+    try:
+        results = tuner.run_tuning_pipeline(n_workers=workers, n_candidates=candidates)
+
+        return {
+            "status": "ok",
+            "message": f"XGBoost tuning done for {len(results)} counters. Check logs for details."
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@router.get("/pipeline/xgboost/runs")
+async def list_xgboost_runs_route():
+    """Registry runs (oldest first) and the run currently served."""
+    return {"current": registry.current_run_id(), "runs": registry.list_runs()}
+
+
+@router.post("/pipeline/xgboost/promote")
+async def promote_xgboost_run_route(
+    run_id: str = Query(..., description="Registry run to serve (see /pipeline/xgboost/runs); promoting an older run rolls back"),
+):
+    """Atomically switch the models served by the prediction pipeline to another registry run."""
+    try:
+        registry.promote(run_id)
+
+        return {
+            "status": "ok",
+            "message": f"Run {run_id} promoted."
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
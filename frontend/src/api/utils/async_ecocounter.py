@@ -0,0 +1,158 @@
+# src/api/utils/async_ecocounter.py
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
+import pandas as pd
+from tqdm import tqdm
+
+from src.api.config import BASE_URL
+from src.api.utils.fetch_ecocounter import timeseries_to_frame
+from src.api.utils.http_client import lookup, store
+
+# Requêtes simultanées et débit maximal vers l'API Ecocounter (même hôte)
+MAX_CONCURRENCY = int(os.getenv("ECOCOUNTER_CONCURRENCY", "8"))
+RATE_PER_SECOND = float(os.getenv("ECOCOUNTER_RATE", "10"))
+
+# Compteurs téléchargés simultanément : borne la mémoire des frames en attente
+MAX_COUNTERS_IN_FLIGHT = int(os.getenv("ECOCOUNTER_COUNTERS_IN_FLIGHT", "4"))
+
+# Nouvelles tentatives : attente BACKOFF_SECONDS * 2^n avec jitter
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Espace les départs de requêtes : au plus `rate` requêtes par seconde."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def build_jobs(df_merged: pd.DataFrame, periods) -> list:
+    """
+    Regroupe les numéros de série par compteur (`nom_csv`) :
+    [{"name", "latitude", "longitude", "ids", "periods"}, ...].
+    `periods` : liste commune à tous les compteurs, ou dict {nom: périodes}
+    (les compteurs sans période sont ignorés).
+    """
+    jobs = []
+    for name, group in df_merged.groupby("nom_csv", sort=False):
+        counter_periods = periods.get(name, []) if isinstance(periods, dict) else periods
+        if not counter_periods:
+            continue
+        jobs.append({
+            "name": name,
+            "latitude": group["latitude"].iloc[0],
+            "longitude": group["longitude"].iloc[0],
+            "ids": group["id"].tolist(),
+            "periods": counter_periods,
+        })
+    return jobs
+
+
+def _parse_body(body: str) -> pd.DataFrame:
+    try:
+        return timeseries_to_frame(json.loads(body))
+    except (KeyError, ValueError):  # réponse inexploitable : période ignorée
+        return pd.DataFrame()
+
+
+async def _fetch_timeseries(client, limiter, semaphore, counter_id, start_date, end_date) -> pd.DataFrame:
+    url = f"{BASE_URL}/ecocounter_timeseries/{counter_id}/attrs/intensity"
+    params = {"fromDate": start_date, "toDate": end_date}
+
+    # Cache disque partagé avec les appels synchrones (cf. http_client)
+    body = lookup(url, params, source="history")
+    if body is not None:
+        return _parse_body(body)
+
+    for attempt in range(MAX_RETRIES + 1):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                r = await client.get(url, params=params)
+                if r.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+                    r.raise_for_status()
+                    df = _parse_body(r.text)
+                    store(url, params, "history", r.text)
+                    return df
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt == MAX_RETRIES:
+                    raise
+        await asyncio.sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+async def _fetch_counter(client, limiter, semaphore, job: dict):
+    """Toutes les périodes de tous les numéros de série d'un compteur, sommées par heure."""
+    frames = await asyncio.gather(*[
+        _fetch_timeseries(client, limiter, semaphore, counter_id, start, end)
+        for counter_id in job["ids"]
+        for start, end in job["periods"]
+    ])
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return job["name"], pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df.groupby("timestamp", as_index=False)["intensity"].sum()
+    df.insert(0, "name", job["name"])
+    df.insert(1, "latitude", job["latitude"])
+    df.insert(2, "longitude", job["longitude"])
+    return job["name"], df
+
+
+async def iter_counters(jobs: list, max_concurrency: int = MAX_CONCURRENCY, rate: float = RATE_PER_SECOND,
+                        max_counters: int = MAX_COUNTERS_IN_FLIGHT):
+    """
+    Générateur asynchrone : produit (nom, DataFrame) pour chaque compteur dès que
+    toutes ses requêtes sont terminées. Un seul client HTTP (connexions réutilisées),
+    concurrence bornée et débit limité. Au plus `max_counters` compteurs sont
+    téléchargés en même temps : les suivants démarrent quand un compteur est livré.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = RateLimiter(rate)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        queue = iter(jobs)
+        pending = set()
+        try:
+            while True:
+                for job in queue:
+                    pending.add(asyncio.create_task(_fetch_counter(client, limiter, semaphore, job)))
+                    if len(pending) >= max_counters:
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def download_counters(jobs: list, on_counter, **kwargs) -> None:
+    """Version synchrone : appelle `on_counter(nom, df)` à l'arrivée de chaque compteur."""
+    async def _run():
+        with tqdm(total=len(jobs), desc="Compteurs") as progress:
+            async for name, df in iter_counters(jobs, **kwargs):
+                on_counter(name, df)
+                progress.update(1)
+
+    asyncio.run(_run())
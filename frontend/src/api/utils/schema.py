@@ -0,0 +1,92 @@
+# src/api/utils/schema.py
+"""
+Schéma de types compacts commun à tous les DataFrames des pipelines
+(counters_final, counters_forecast, features XGBoost).
+
+- noms (compteur, jour)    : category
+- indicateurs 0/1, classes : int8
+- features calendaires     : int8 / int16
+- météo                    : float32
+- intensité                : Int32 (nullable : un relevé manquant n'est pas un comptage nul)
+"""
+import numpy as np
+import pandas as pd
+
+COLUMN_DTYPES = {
+    # Identifiants
+    "name": "category",
+    "nom_jour": "category",
+    # Cible
+    "intensity": "Int32",
+    # Météo
+    "temperature_2m": "float32",
+    "precipitation": "float32",
+    "windspeed_10m": "float32",
+    "precipitation_class": "int8",
+    "is_raining": "int8",
+    # Calendrier
+    "jour_semaine": "int8",
+    "is_weekend": "int8",
+    "is_ferie": "int8",
+    "is_vacances": "int8",
+    "is_jour_ouvre": "int8",
+    # Features temporelles (loader.create_features)
+    "hour": "int8",
+    "dayofweek": "int8",
+    "quarter": "int8",
+    "month": "int8",
+    "dayofyear": "int16",
+    "year": "int16",
+}
+
+# Indicateurs 0/1 : une valeur manquante vaut "non"
+FLAG_COLUMNS = {"is_raining", "is_weekend", "is_ferie", "is_vacances", "is_jour_ouvre"}
+
+# Décimales conservées en repassant un float32 en float64 pour l'écriture
+# (évite 21.299999237060547 au lieu de 21.3 dans le JSON)
+FLOAT32_DECIMALS = 4
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Empreinte mémoire réelle (chaînes comprises) en Mo."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def apply_schema(df: pd.DataFrame, label: str = None, schema: dict = COLUMN_DTYPES) -> pd.DataFrame:
+    """
+    Convertit en place les colonnes connues de `df` vers leur type compact.
+    Valeurs manquantes : 0 pour les indicateurs (FLAG_COLUMNS), <NA> pour un entier nullable
+    (Int32), sinon la colonne reste en float32 (NaN). Affiche l'empreinte avant/après quand
+    `label` est fourni.
+    """
+    before = memory_mb(df) if label else None
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        target = pd.api.types.pandas_dtype(dtype)
+        if dtype == "category":
+            df[col] = df[col].astype("category")
+        elif col in FLAG_COLUMNS:
+            df[col] = pd.to_numeric(df[col]).fillna(0).round().astype(dtype)
+        elif target.kind in "iu":
+            values = pd.to_numeric(df[col])
+            if isinstance(target, np.dtype) and values.isna().any():
+                df[col] = values.astype("float32")
+            else:
+                df[col] = values.round().astype(dtype)
+        else:
+            df[col] = pd.to_numeric(df[col]).astype(dtype)
+    if label:
+        print(f"   🧮 {label} : {before:.1f} Mo -> {memory_mb(df):.1f} Mo (schéma compact)")
+    return df
+
+
+def storage_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Copie prête pour `to_dict` / JSON : float32 -> float64 arrondi, category -> valeurs."""
+    out = df.copy(deep=False)
+    for col in out.columns:
+        if out[col].dtype == np.float32:
+            out[col] = out[col].astype(np.float64).round(FLOAT32_DECIMALS)
+        elif isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(object)
+    return out
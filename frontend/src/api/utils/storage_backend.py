@@ -0,0 +1,378 @@
+# src/api/utils/storage_backend.py
+"""
+Backend de stockage interchangeable pour les pipelines.
+
+STORAGE_BACKEND=supabase (défaut) : client Supabase habituel.
+STORAGE_BACKEND=sqlite            : base SQLite embarquée (SQLITE_PATH) qui implémente
+                                    le sous-ensemble de l'API `table(...)` utilisé par le projet
+                                    (select / eq / neq / gt / gte / lt / lte / in_ / is_ / or_ /
+                                    order / limit / range / insert / upsert / delete).
+
+Les tables et colonnes sont créées à la volée au premier insert. Les timestamps ISO sont
+normalisés en "YYYY-MM-DDTHH:MM:SS" UTC (les valeurs sans fuseau sont lues comme UTC, comme
+Postgres avec une session en UTC) : les comparaisons texte de SQLite restent chronologiques.
+
+Copie d'un instantané Supabase vers la base locale :
+    python -m src.api.utils.storage_backend clone counters_final meteo_history ...
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/local.db")
+
+_TS_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _normalize(value):
+    """Convertit une valeur Python/JSON en valeur SQLite comparable."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str) and _TS_RE.match(value):
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc)
+        return dt.strftime("%Y-%m-%dT%H:%M:%S")
+    if hasattr(value, "isoformat"):  # datetime / date / pd.Timestamp
+        return _normalize(value.isoformat())
+    return value
+
+
+def _ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class LocalResponse:
+    """Réponse compatible avec `APIResponse` de postgrest (`.data`, `.count`)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+# ------------------------------
+# Syntaxe PostgREST des filtres or=(...)
+# ------------------------------
+def _split_top_level(text: str) -> list:
+    """Découpe sur les virgules hors guillemets et hors parenthèses."""
+    parts, depth, quoted, current, i = [], 0, False, [], 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\" and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value: str):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _parse_logic(text: str):
+    """Traduit une expression `or`/`and` PostgREST en (sql, params)."""
+    clauses, params = [], []
+    for term in _split_top_level(text):
+        match = re.match(r"^(and|or)\((.*)\)$", term, re.S)
+        if match:
+            sql, sub_params = _parse_logic(match.group(2))
+            joiner = " AND " if match.group(1) == "and" else " OR "
+            clauses.append("(" + joiner.join(sql) + ")")
+            params.extend(sub_params)
+            continue
+        column, op, raw = term.split(".", 2)
+        if op == "in":
+            values = [_normalize(_unquote(v)) for v in _split_top_level(raw.strip("()"))]
+            clauses.append(f"{_ident(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        elif op == "is":
+            clauses.append(f"{_ident(column)} IS NULL" if raw == "null" else f"{_ident(column)} IS NOT NULL")
+        else:
+            clauses.append(f"{_ident(column)} {_OPERATORS[op]} ?")
+            params.append(_normalize(_unquote(raw)))
+    return clauses, params
+
+
+class LocalQuery:
+    """Constructeur de requête chaînable, exécuté sur SQLite par `execute()`."""
+
+    def __init__(self, client, table_name: str):
+        self._client = client
+        self._table = table_name
+        self._action = "select"
+        self._columns = "*"
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # --- actions ---
+    def select(self, columns: str = "*", *args, **kwargs):
+        self._action, self._columns = "select", columns
+        return self
+
+    def insert(self, json, *args, **kwargs):
+        self._action, self._payload = "insert", json
+        return self
+
+    def upsert(self, json, *args, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs):
+        self._action, self._payload = "upsert", json
+        self._on_conflict = on_conflict or "id"
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def delete(self, *args, **kwargs):
+        self._action = "delete"
+        return self
+
+    # --- filtres ---
+    def _filter(self, column, op, value):
+        if value is None:
+            self._where.append(f"{_ident(column)} IS {'NOT ' if op == 'neq' else ''}NULL")
+        else:
+            self._where.append(f"{_ident(column)} {_OPERATORS[op]} ?")
+            self._params.append(_normalize(value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        values = [_normalize(v) for v in values]
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_ident(column)} IN ({', '.join('?' * len(values))})")
+        self._params.extend(values)
+        return self
+
+    def is_(self, column, value):
+        return self._filter(column, "eq", None) if value in (None, "null") else self._filter(column, "neq", None)
+
+    def or_(self, filters: str, *args, **kwargs):
+        clauses, params = _parse_logic(filters)
+        self._where.append("(" + " OR ".join(clauses) + ")")
+        self._params.extend(params)
+        return self
+
+    # --- modificateurs ---
+    def order(self, column, *args, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, *args, **kwargs):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, *args, **kwargs):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def execute(self) -> LocalResponse:
+        with self._client._lock:
+            if self._action == "select":
+                return LocalResponse(self._client._select(self))
+            if self._action in ("insert", "upsert"):
+                return LocalResponse(self._client._write(self))
+            return LocalResponse(self._client._delete(self))
+
+
+class LocalClient:
+    """Client SQLite exposant `table(name)` comme le client Supabase."""
+
+    def __init__(self, path: str = SQLITE_PATH):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._columns = {}  # table -> liste des colonnes connues
+        self._indexes = set()
+
+    def table(self, table_name: str) -> LocalQuery:
+        return LocalQuery(self, table_name)
+
+    # --- schéma ---
+    def _table_columns(self, table: str) -> list:
+        if table not in self._columns:
+            rows = self._conn.execute(f"PRAGMA table_info({_ident(table)})").fetchall()
+            if not rows:
+                return []
+            self._columns[table] = [row["name"] for row in rows]
+        return self._columns[table]
+
+    def _ensure_columns(self, table: str, columns) -> None:
+        if not self._table_columns(table):
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_ident(table)} (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+            self._columns[table] = ["id"]
+        for column in columns:
+            if column not in self._columns[table]:
+                self._conn.execute(f"ALTER TABLE {_ident(table)} ADD COLUMN {_ident(column)}")
+                self._columns[table].append(column)
+
+    def _ensure_index(self, table: str, columns, unique: bool = False) -> None:
+        key = (table, tuple(columns), unique)
+        if key in self._indexes or list(columns) == ["id"]:
+            return
+        name = "ux_" if unique else "ix_"
+        name += re.sub(r"\W", "_", f"{table}_{'_'.join(columns)}")
+        cols = ", ".join(_ident(c) for c in columns)
+        self._conn.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {_ident(name)} ON {_ident(table)} ({cols})"
+        )
+        self._indexes.add(key)
+
+    def _where_sql(self, query: LocalQuery) -> str:
+        return f" WHERE {' AND '.join(query._where)}" if query._where else ""
+
+    # --- exécution ---
+    def _select(self, query: LocalQuery) -> list:
+        existing = self._table_columns(query._table)
+        if not existing:
+            return []  # table jamais écrite : équivalent d'une table vide
+
+        if query._columns.strip() == "*":
+            select_sql = "*"
+        else:
+            wanted = [c.strip() for c in query._columns.split(",") if c.strip()]
+            select_sql = ", ".join(
+                _ident(c) if c in existing else f"NULL AS {_ident(c)}" for c in wanted
+            )
+
+        sql = f"SELECT {select_sql} FROM {_ident(query._table)}{self._where_sql(query)}"
+        if query._order:
+            order_cols = [c for c, _ in query._order if c in existing]
+            if order_cols:
+                self._ensure_index(query._table, order_cols)
+            sql += " ORDER BY " + ", ".join(f"{_ident(c)}{' DESC' if desc else ''}" for c, desc in query._order)
+        if query._limit is not None:
+            sql += f" LIMIT {int(query._limit)}"
+            if query._offset:
+                sql += f" OFFSET {int(query._offset)}"
+        return [dict(row) for row in self._conn.execute(sql, query._params)]
+
+    def _write(self, query: LocalQuery) -> list:
+        rows = query._payload
+        if isinstance(rows, (bytes, str)):
+            rows = json.loads(rows)
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            return []
+
+        columns = list(dict.fromkeys(c for row in rows for c in row))
+        self._ensure_columns(query._table, columns)
+        values = [[_normalize(row.get(c)) for c in columns] for row in rows]
+
+        cols_sql = ", ".join(_ident(c) for c in columns)
+        sql = f"INSERT INTO {_ident(query._table)} ({cols_sql}) VALUES ({', '.join('?' * len(columns))})"
+        if query._action == "upsert":
+            keys = [k.strip() for k in query._on_conflict.split(",")]
+            self._ensure_columns(query._table, keys)
+            self._ensure_index(query._table, keys, unique=True)
+            updates = [c for c in columns if c not in keys]
+            sql += f" ON CONFLICT ({', '.join(_ident(k) for k in keys)}) "
+            if query._ignore_duplicates or not updates:
+                sql += "DO NOTHING"
+            else:
+                sql += "DO UPDATE SET " + ", ".join(f"{_ident(c)} = excluded.{_ident(c)}" for c in updates)
+
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(sql, values)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def _delete(self, query: LocalQuery) -> list:
+        if not self._table_columns(query._table):
+            return []
+        self._conn.execute(f"DELETE FROM {_ident(query._table)}{self._where_sql(query)}", query._params)
+        return []
+
+
+def create_storage_client(backend: str = None):
+    """Crée le client du backend configuré (STORAGE_BACKEND)."""
+    backend = backend or STORAGE_BACKEND
+    if backend == "sqlite":
+        return LocalClient(SQLITE_PATH)
+    if backend != "supabase":
+        raise ValueError(f"STORAGE_BACKEND inconnu : {backend}")
+
+    from supabase import create_client
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("Erreur : SUPABASE_URL ou SUPABASE_KEY manquant dans le .env")
+    return create_client(url, key)
+
+
+def clone_from_supabase(tables, target=None) -> dict:
+    """Copie des tables Supabase vers la base locale (profilage à taille réelle)."""
+    from src.api.utils.bulk_writer import NATURAL_KEYS, bulk_insert
+    from src.api.utils.supabase_reader import fetch_table
+
+    source = create_storage_client("supabase")
+    target = target or LocalClient(SQLITE_PATH)
+    copied = {}
+    for table in tables:
+        df = fetch_table(table, keys=NATURAL_KEYS.get(table, ("id",)), client=source)
+        copied[table] = bulk_insert(table, df, client=target).rows_written
+    return copied
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "clone":
+        print(clone_from_supabase(sys.argv[2:]))
+    else:
+        print("Usage : python -m src.api.utils.storage_backend clone <table> [<table> ...]")
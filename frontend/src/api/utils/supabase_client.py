@@ -1,20 +1,28 @@
 #src/api/utils/supabase_client.py
-import os
-from supabase import create_client
-from dotenv import load_dotenv
+import threading
+from src.api.utils.storage_backend import STORAGE_BACKEND, create_storage_client
 
-load_dotenv()
+# Registre des clients partagés, créés au premier appel (aucune I/O à l'import).
+# Réutiliser le même client réutilise aussi son pool HTTP keep-alive (httpx) :
+# pas de nouvelle poignée de main TLS à chaque requête.
+_clients = {}
+_lock = threading.Lock()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-try:
-    response = supabase.table("counters").select("*").limit(1).execute()
-    if response.data is not None:
-        print("Connection work")
-        print(response.data)
-    else:
-        print("Connexion établie, mais aucune donnée disponible.")
-except Exception as e:
-    print(e)
\ No newline at end of file
+def get_client(backend: str = None):
+    """Retourne le client partagé du backend (STORAGE_BACKEND par défaut)."""
+    backend = backend or STORAGE_BACKEND
+    client = _clients.get(backend)
+    if client is None:
+        with _lock:
+            client = _clients.get(backend)
+            if client is None:
+                client = create_storage_client(backend)
+                _clients[backend] = client
+    return client
+
+
+def reset_clients():
+    """Oublie les clients créés (ex. après un changement de configuration)."""
+    with _lock:
+        _clients.clear()
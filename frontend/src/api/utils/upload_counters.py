@@ -1,7 +1,10 @@
+import asyncio
 import pandas as pd
 from tqdm import tqdm
-from src.api.utils.fetch_ecocounter import fetch_counter_timeseries
-from src.api.utils.supabase_client import supabase
+from src.api.utils.async_ecocounter import build_jobs, download_counters, iter_counters
+from src.api.utils.bulk_writer import WRITE_MODE, bulk_write
+from src.api.utils.serialization import format_timestamps
+from src.api.utils.supabase_reader import latest_by_name
 
 # Calcul dynamique de la date de fin (Fin du mois précédent)
 # On utilise UTC pour être cohérent avec le format de données
@@ -10,48 +13,97 @@ today = pd.Timestamp.now('UTC')
 last_month_end = (today.replace(day=1) - pd.Timedelta(days=1)).replace(hour=23, minute=59, second=59)
 DATE_FIN_CIBLE = last_month_end.strftime("%Y-%m-%dT%H:%M:%S")
 
+# Début de l'historique Ecocounter (rechargement complet)
+DATE_DEBUT_HISTORIQUE = "2023-01-01T00:00:00"
+
+# Ingestion en flux : lignes envoyées par écriture (borne la mémoire des lots JSON)
+STREAM_CHUNK_ROWS = 50_000
+
+def yearly_periods(start_date, end_date):
+    """Découpe [start_date, end_date] en périodes calendaires annuelles pour l'API."""
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    periods = []
+    while start <= end:
+        year_end = min(end, pd.Timestamp(year=start.year, month=12, day=31, hour=23, minute=59, second=59))
+        periods.append((start.strftime("%Y-%m-%dT%H:%M:%S"), year_end.strftime("%Y-%m-%dT%H:%M:%S")))
+        start = pd.Timestamp(year=start.year + 1, month=1, day=1)
+    return periods
+
+def incremental_periods(df_merged, end_date=DATE_FIN_CIBLE, client=None):
+    """
+    Périodes à télécharger par compteur : de la dernière heure stockée dans `counters`
+    (+1h) jusqu'à `end_date`. Un compteur absent de la table repart du début de l'historique.
+    """
+    names = df_merged["nom_csv"].unique().tolist()
+    last_timestamps = latest_by_name("counters", names, client=client)
+
+    periods = {}
+    for name in names:
+        if name in last_timestamps:
+            last = pd.Timestamp(last_timestamps[name])
+            if last.tzinfo is not None:
+                last = last.tz_convert("UTC").tz_localize(None)
+            start = last + pd.Timedelta(hours=1)
+        else:
+            start = DATE_DEBUT_HISTORIQUE
+        periods[name] = yearly_periods(start, end_date)
+
+    up_to_date = sum(1 for p in periods.values() if not p)
+    print(f"📌 {len(names) - up_to_date} compteurs à compléter, {up_to_date} déjà à jour.")
+    return periods
+
+def _finalize_counters(df):
+    """Tri, borne DATE_FIN_CIBLE et timestamps ISO (chaînes) prêts pour le stockage."""
+    df = df.sort_values(by=["name", "timestamp"])
+    df = df[df["timestamp"] <= DATE_FIN_CIBLE]
+
+    # convert timestamp in string ISO for json (kirillsst)
+    return format_timestamps(df, columns=['timestamp'])
+
 def download_and_merge_timeseries(df_merged, PERIODES):
     all_dfs = []
 
-    PERIODES = [
-        ("2023-01-01T00:00:00", "2023-12-31T23:59:59"),
-        ("2024-01-01T00:00:00", "2024-12-31T23:59:59"),
-        ("2025-01-01T00:00:00", DATE_FIN_CIBLE)
-    ]
-
-    for _, row in tqdm(df_merged.iterrows(), total=len(df_merged)):
-        api_id = row["id"]
-        for start_date, end_date in PERIODES:
-            try:
-                df_temp = fetch_counter_timeseries(api_id, start_date, end_date)
-                if not df_temp.empty:
-                    df_temp["name"] = row["nom_csv"]
-                    df_temp["latitude"] = row["latitude"]
-                    df_temp["longitude"] = row["longitude"]
-                    all_dfs.append(df_temp)
-            except KeyError:  # new (04/12/2025)
-                continue
-            except ValueError:
-                continue # ------- 
+    # Téléchargement asynchrone : chaque compteur est ajouté dès qu'il est complet
+    def collect(name, df):
+        if not df.empty:
+            all_dfs.append(df)
+
+    download_counters(build_jobs(df_merged, PERIODES), collect)
 
     if all_dfs:
         df_concat = pd.concat(all_dfs, ignore_index=True)
         df_final = df_concat.groupby(['name', 'latitude', 'longitude', 'timestamp'], as_index=False)['intensity'].sum()
-        df_final = df_final.sort_values(by=["name", "timestamp"])
-        df_final = df_final[df_final["timestamp"] <= DATE_FIN_CIBLE]
-
-        # convert timestamp in string ISO for json (kirillsst)
-        df_final['timestamp'] = df_final['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')
-        return df_final
+        return _finalize_counters(df_final)
     return pd.DataFrame()
 
-def upload_to_supabase(df_final):
+def stream_to_supabase(df_merged, PERIODES, mode: str = WRITE_MODE, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """
+    Ingestion en flux : chaque compteur est téléchargé, sommé sur ses numéros de série,
+    converti en timestamps ISO puis écrit par tranches de `chunk_rows` lignes pendant que
+    les compteurs suivants se téléchargent. La mémoire reste bornée par quelques compteurs
+    (MAX_COUNTERS_IN_FLIGHT) au lieu de l'archive complète.
+    """
+    jobs = build_jobs(df_merged, PERIODES)
+
+    async def _run():
+        rows_written = 0
+        with tqdm(total=len(jobs), desc="Compteurs") as progress:
+            async for name, df in iter_counters(jobs):
+                if not df.empty:
+                    df = _finalize_counters(df)
+                    for start in range(0, len(df), chunk_rows):
+                        chunk = df.iloc[start:start + chunk_rows]
+                        report = await asyncio.to_thread(bulk_write, "counters", chunk, mode=mode)
+                        rows_written += report.rows_written
+                progress.update(1)
+        return rows_written
+
+    return asyncio.run(_run())
+
+def upload_to_supabase(df_final, mode: str = WRITE_MODE):
     if df_final.empty:
         print("Aucune donnée à uploader.")
         return 0
 
-    records = df_final.to_dict(orient="records")
-    for i in range(0, len(records), 500):  # batch insert
-        batch = records[i:i+500]
-        supabase.table("counters").insert(batch).execute()
-    return len(records)
+    report = bulk_write("counters", df_final, mode=mode)
+    return report.rows_written
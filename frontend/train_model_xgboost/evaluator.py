@@ -1,4 +1,6 @@
 # train_model_xgboost/evaluator.py
+import numpy as np
+import pandas as pd
 from sklearn.metrics import mean_absolute_error
 
 def evaluate(y_true, y_pred):
@@ -7,4 +9,16 @@ def evaluate(y_true, y_pred):
     mean_val = y_true.mean()
     error_pct = (mae / mean_val) * 100 if mean_val > 0 else 0
     
-    return round(mae, 2), round(error_pct, 2)
\ No newline at end of file
+    return round(mae, 2), round(error_pct, 2)
+
+def evaluate_by_counter(names, y_true, y_pred):
+    """MAE et erreur % par compteur (modèle global) : [{"Compteur", "MAE", "Erreur %"}, ...]."""
+    df = pd.DataFrame({
+        "Compteur": np.asarray(names),
+        "abs_err": np.abs(np.asarray(y_true, dtype=float) - np.asarray(y_pred, dtype=float)),
+        "y": np.asarray(y_true, dtype=float),
+    })
+    scores = df.groupby("Compteur", sort=False).agg(MAE=("abs_err", "mean"), mean_val=("y", "mean"))
+    scores["Erreur %"] = np.where(scores["mean_val"] > 0, scores["MAE"] / scores["mean_val"] * 100, 0)
+    scores = scores[["MAE", "Erreur %"]].round(2).reset_index()
+    return scores.to_dict(orient="records")
@@ -1,59 +1,260 @@
 # train_model_xgboost/pipeline.py
 import logging
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
-from train_model_xgboost import (loader, trainer, evaluator, saver)
+from train_model_xgboost import (loader, trainer, evaluator, saver, registry)
+from train_model_xgboost.config import (GLOBAL_MODEL_NAME, INCREMENTAL_TOLERANCE, MODEL_MODE,
+                                        TRAIN_WORKERS, VALIDATION_DAYS)
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger()
 
-def run_xgboost_pipeline():
-    logger.info("🚀 DÉMARRAGE DU PIPELINE XGBOOST")
+# Dataset partagé avec les processus d'entraînement (hérité au fork, pas de pickle par tâche)
+_WORKER = {}
 
-    # 1. Chargement
-    df_global = loader.load_full_dataset()
-    compteurs = df_global['name'].unique()
-    results = []
-
-    # 2. Boucle Compteurs
-    for name in compteurs:
-        logger.info(f"🔹 XGBoost sur : {name}")
-        
-        # A. Préparation (X, y)
-        X_train, y_train, X_test, y_test, dates_test = loader.get_data_for_counter(df_global, name)
-        
+
+def thread_budget(n_counters, n_workers=None):
+    """
+    (processus, threads XGBoost par processus) tels que processus × n_jobs = coeurs.
+    `n_workers` : 0 / None = automatique (un processus par coeur, au plus un par compteur).
+    """
+    cores = os.cpu_count() or 1
+    workers = n_workers or cores
+    workers = max(1, min(workers, cores, n_counters))
+    return workers, max(1, cores // workers)
+
+
+def fit_or_top_up(prepare, name, previous=None, n_jobs=-1, cutoff=None):
+    """
+    Entraîne le modèle `name`, en incrémental si `previous` (son état dans
+    saver.load_training_state), avec les mêmes hyperparamètres, et son artefact existent :
+    - aucune ligne d'entraînement depuis son watermark (fin du train du run précédent,
+      lue dans le manifeste) -> modèle conservé ;
+    - sinon, au plus INCREMENTAL_ROUNDS arbres ajoutés sur les nouvelles lignes ;
+    - si la MAE de validation dépasse alors la référence de plus de INCREMENTAL_TOLERANCE,
+      ré-entraînement complet.
+    Hyperparamètres : ceux réglés par tuner.py pour ce modèle s'ils existent.
+    `prepare(since)` retourne le 7-uplet de loader.split_features, découpé à `cutoff`
+    (cf. loader.data_cutoff) : le nouveau watermark est la fin du train qui en découle.
+    Retourne (model, état, X_test, y_test, type d'entraînement), ou None sans données de test.
+    """
+    watermark = loader.train_end(VALIDATION_DAYS, cutoff)
+    params = saver.load_params(name)
+    # Un modèle construit avec d'autres hyperparamètres (réglé depuis) repart de zéro
+    model = saver.load_model(name) if previous and previous.get("params") == params else None
+
+    if model is not None:
+        since = pd.Timestamp(previous["watermark"])
+        X_new, y_new, X_test, y_test, _, X_val, y_val = prepare(since)
         if X_test.empty:
-            continue
+            return None
+
+        if X_new.empty:
+            return model, previous, X_test, y_test, "inchangé"
+
+        candidate = trainer.continue_training(model, X_new, y_new, n_jobs=n_jobs, X_val=X_val, y_val=y_val,
+                                              params=params)
+        val_mae = _validation_mae(candidate, X_val, y_val)
+        reference = previous.get("val_mae_ref")
+        if val_mae is None or reference is None or val_mae <= reference * (1 + INCREMENTAL_TOLERANCE):
+            state = {"watermark": watermark.isoformat(), "val_mae_ref": reference, "params": params}
+            return candidate, state, X_test, y_test, "incrémental"
+        logger.info(f"   ↩️ {name} : MAE validation {val_mae} > référence {reference} -> ré-entraînement complet")
+
+    # Entraînement complet : il fixe la référence de validation des mises à jour suivantes
+    X_train, y_train, X_test, y_test, _, X_val, y_val = prepare(None)
+    if X_test.empty:
+        return None
+
+    model = trainer.train_model(X_train, y_train, n_jobs=n_jobs, X_val=X_val, y_val=y_val, params=params)
+    state = {"watermark": watermark.isoformat(), "val_mae_ref": _validation_mae(model, X_val, y_val),
+             "params": params}
+    return model, state, X_test, y_test, "complet"
+
+
+def _validation_mae(model, X_val, y_val):
+    if X_val.empty:
+        return None
+    return evaluator.evaluate(y_val, trainer.make_predictions(model, X_val).clip(0))[0]
+
+
+def train_counter(df_global, name, rows=None, n_jobs=-1, previous=None, run_id=None, cutoff=None):
+    """
+    Entraîne, évalue et sauvegarde le modèle d'un compteur dans le run `run_id` du registre.
+    Retourne sa ligne de métriques (avec l'état d'entraînement sous la clé "_state").
+    `previous`, `cutoff` : cf. `fit_or_top_up`.
+    """
+    logger.info(f"🔹 XGBoost sur : {name}")
+
+    # A-B. Préparation (X, y) + fenêtre de validation pour l'early stopping, puis entraînement
+    def prepare(since):
+        return loader.get_data_for_counter(df_global, name, rows, validation_days=VALIDATION_DAYS, since=since,
+                                           cutoff=cutoff)
+
+    fitted = fit_or_top_up(prepare, name, previous, n_jobs, cutoff)
+    if fitted is None:
+        return None
+    model, state, X_test, y_test, kind = fitted
+
+    # C. Prédiction
+    preds = trainer.make_predictions(model, X_test)
+
+    # Petit nettoyage : pas de prédictions négatives en vélo !
+    preds = [max(0, x) for x in preds]
+
+    # D. Évaluation
+    mae, error_pct = evaluator.evaluate(y_test, preds)
+    logger.info(f"   📊 {name} : MAE={mae} | Err={error_pct}% | {trainer.n_trees(model)} arbres ({kind})")
+
+    # E. Sauvegarde (même inchangé : chaque run du registre est complet)
+    model_file = saver.save_model(model, name, run_id)
+
+    return {
+        "Compteur": name,
+        "MAE": mae,
+        "Erreur %": error_pct,
+        "Arbres": trainer.n_trees(model),
+        "Entraînement": kind,
+        "Modèle": model_file,
+        "_state": state
+    }
 
-        # B. Entraînement
-        model = trainer.train_model(X_train, y_train)
 
-        # C. Prédiction
-        preds = trainer.make_predictions(model, X_test)
-        
-        # Petit nettoyage : pas de prédictions négatives en vélo !
-        preds = [max(0, x) for x in preds]
+def _init_worker(df_global, groups, n_jobs, states, run_id, cutoff):
+    _WORKER.update(df=df_global, groups=groups, n_jobs=n_jobs, states=states, run_id=run_id, cutoff=cutoff)
 
-        # D. Évaluation
-        mae, error_pct = evaluator.evaluate(y_test, preds)
-        logger.info(f"   📊 Score : MAE={mae} | Err={error_pct}%")
 
-        # E. Sauvegarde
-        model_file = saver.save_model(model, name)
+def _train_in_worker(name):
+    return train_counter(_WORKER["df"], name, _WORKER["groups"][name], _WORKER["n_jobs"],
+                         _WORKER["states"].get(name), _WORKER["run_id"], _WORKER["cutoff"])
 
-        results.append({
-            "Compteur": name,
-            "MAE": mae,
-            "Erreur %": error_pct,
-            "Modèle": model_file
-        })
+
+def _collect(results, states, run):
+    """
+    Retire "_state" des lignes de métriques, le reporte dans `states` et inscrit chaque
+    modèle au manifeste de `run` (tous deux modifiés en place).
+    """
+    for row in results:
+        state = states[row["Compteur"]] = row.pop("_state")
+        registry.add_model(
+            run, row["Compteur"], row["Modèle"], loader.FEATURES_XGBOOST, row["Arbres"],
+            {"MAE": row["MAE"], "Erreur %": row["Erreur %"], "MAE val réf": state["val_mae_ref"]},
+            state["watermark"], state["params"],
+        )
+    return results
+
+
+def train_counters(df_global, n_workers=None, states=None, run=None):
+    """
+    Entraîne un modèle par compteur, en séquentiel ou sur un pool de processus
+    (cf. `thread_budget`). Retourne les lignes de métriques, dans l'ordre des compteurs.
+    `states` : états d'entraînement (cf. saver.load_training_state), mis à jour en place ;
+    un compteur qui y figure est ré-entraîné en incrémental.
+    `run` : run du registre (cf. registry.start_run) qui reçoit les modèles.
+    """
+    states = {} if states is None else states
+    run = run or registry.start_run("per_counter")
+    groups = loader.counter_rows(df_global)
+    compteurs = list(groups)
+    # Même découpage train / validation / test pour tous les compteurs
+    cutoff = loader.data_cutoff(df_global)
+
+    workers, n_jobs = thread_budget(len(compteurs), TRAIN_WORKERS if n_workers is None else n_workers)
+    logger.info(f"⚙️ {len(compteurs)} compteurs : {workers} processus × {n_jobs} threads XGBoost")
+    start = time.perf_counter()
+
+    if workers == 1:
+        results = [train_counter(df_global, name, groups[name], n_jobs, states.get(name), run["run_id"], cutoff)
+                   for name in compteurs]
+    else:
+        # fork : les processus héritent de df_global sans copie ni sérialisation
+        context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(df_global, groups, n_jobs, states, run["run_id"], cutoff)) as pool:
+            results = list(pool.map(_train_in_worker, compteurs))
+
+    results = _collect([r for r in results if r is not None], states, run)
+    logger.info(f"⏱️ Entraînement : {time.perf_counter() - start:.1f}s ({len(results)} modèles)")
+    return results
+
+
+def train_global(df_global, states=None, run=None):
+    """
+    Un seul modèle pour tous les compteurs (compteur en feature catégorielle + coordonnées),
+    tous les coeurs pour XGBoost. Retourne une ligne de métriques par compteur.
+    `states`, `run` : cf. `train_counters` (clé GLOBAL_MODEL_NAME).
+    """
+    states = {} if states is None else states
+    run = run or registry.start_run("global")
+    logger.info(f"🌐 XGBoost global sur {df_global['name'].nunique()} compteurs")
+    start = time.perf_counter()
+
+    # Features calculées une fois, même si le ré-entraînement incrémental échoue
+    df_features = loader.create_features(df_global)
+    cutoff = loader.data_cutoff(df_global)
+
+    def prepare(since):
+        return loader.split_features(df_features, loader.FEATURES_GLOBAL, VALIDATION_DAYS, since, cutoff)
+
+    fitted = fit_or_top_up(prepare, GLOBAL_MODEL_NAME, states.get(GLOBAL_MODEL_NAME), cutoff=cutoff)
+    if fitted is None:
+        return []
+    model, state, X_test, y_test, kind = fitted
+    states[GLOBAL_MODEL_NAME] = state
+    preds = trainer.make_predictions(model, X_test).clip(0)
+
+    mae, error_pct = evaluator.evaluate(y_test, preds)
+    logger.info(f"   📊 Global : MAE={mae} | Err={error_pct}% | {trainer.n_trees(model)} arbres ({kind})")
+
+    model_file = saver.save_model(model, GLOBAL_MODEL_NAME, run["run_id"])
+    registry.add_model(
+        run, GLOBAL_MODEL_NAME, model_file, loader.FEATURES_GLOBAL, trainer.n_trees(model),
+        {"MAE": mae, "Erreur %": error_pct, "MAE val réf": state["val_mae_ref"]},
+        state["watermark"], state["params"],
+    )
+    results = evaluator.evaluate_by_counter(X_test['name'], y_test, preds)
+    for row in results:
+        row.update({"Arbres": trainer.n_trees(model), "Entraînement": kind, "Modèle": model_file})
+
+    logger.info(f"⏱️ Entraînement : {time.perf_counter() - start:.1f}s (1 modèle)")
+    return results
+
+
+def run_xgboost_pipeline(n_workers: int = None, mode: str = None, incremental: bool = False,
+                         promote: bool = True):
+    """
+    `incremental` : reprend les modèles existants (cf. `fit_or_top_up`) au lieu de tout
+    ré-entraîner ; les modèles sans état d'entraînement sont entraînés en entier.
+    Les modèles forment un nouveau run du registre, promu run courant si `promote`.
+    """
+    mode = mode or MODEL_MODE
+    logger.info(f"🚀 DÉMARRAGE DU PIPELINE XGBOOST ({mode}{', incrémental' if incremental else ''})")
+
+    # 1. Chargement
+    df_global = loader.load_full_dataset()
+    states = saver.load_training_state() if incremental else {}
+    run = registry.start_run(mode)
+
+    # 2. Un modèle global, ou boucle Compteurs (séquentielle ou parallèle)
+    if mode == "global":
+        results = train_global(df_global, states, run)
+    else:
+        results = train_counters(df_global, n_workers, states, run)
 
     # 3. Bilan
+    registry.finish_run(run, promote)
+    logger.info(f"🗂️ Run {run['run_id']} : {len(run['models'])} modèles{' (promu)' if promote else ''}")
     saver.save_metrics(results)
-    
+
     # Affichage comparatif rapide
     print("\n--- RÉSULTATS XGBOOST ---")
     print(pd.DataFrame(results).sort_values('MAE').to_string(index=False))
+    return results
 
 if __name__ == "__main__":
-    run_xgboost_pipeline()
\ No newline at end of file
+    run_xgboost_pipeline()
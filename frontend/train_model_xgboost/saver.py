@@ -1,18 +1,70 @@
 # train_model_xgboost/saver.py
+import json
+
 import joblib
 import pandas as pd
+import xgboost as xgb
+from train_model_xgboost import registry
 from train_model_xgboost.config import ARTIFACTS_DIR
 
-def save_model(model, counter_name):
-    """Sauvegarde le modèle XGBoost."""
-    safe_name = counter_name.replace(" ", "_").replace("/", "-")
-    filename = ARTIFACTS_DIR / f"xgboost_{safe_name}.joblib"
-    
-    joblib.dump(model, filename)
-    return filename.name
+def model_path(counter_name):
+    """Ancien fichier joblib d'un compteur (ou du modèle global), d'avant le registre."""
+    return ARTIFACTS_DIR / f"xgboost_{registry.safe_name(counter_name)}.joblib"
+
+def save_model(model, counter_name, run_id):
+    """Sauvegarde le modèle XGBoost dans le run `run_id` du registre (format natif)."""
+    return registry.save_booster(model, counter_name, run_id)
+
+def params_path(counter_name):
+    """Hyperparamètres réglés (cf. tuner.py), à côté du modèle : xgboost_<nom>.params.json."""
+    return model_path(counter_name).with_suffix(".params.json")
+
+def save_params(best, counter_name):
+    """Sauvegarde le résultat du réglage d'un compteur ({"params", "val_mae", "rounds", ...})."""
+    path = params_path(counter_name)
+    path.write_text(json.dumps(best, indent=2, ensure_ascii=False))
+    return path.name
+
+def delete_params(counter_name):
+    """Supprime le réglage d'un compteur (retour aux paramètres par défaut)."""
+    params_path(counter_name).unlink(missing_ok=True)
+
+def load_params(counter_name):
+    """Hyperparamètres réglés d'un compteur, None s'il n'a jamais été réglé."""
+    path = params_path(counter_name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["params"]
 
 def save_metrics(results_list):
     df_res = pd.DataFrame(results_list).sort_values("MAE")
     path = ARTIFACTS_DIR / "training_metrics_xgboost.csv"
     df_res.to_csv(path, index=False)
-    print(f"\n✅ Métriques XGBoost sauvegardées : {path}")
\ No newline at end of file
+    print(f"\n✅ Métriques XGBoost sauvegardées : {path}")
+
+def load_model(counter_name):
+    """
+    Modèle d'un compteur (ou du modèle global) du run courant du registre, à défaut
+    l'ancien fichier joblib ; None s'il n'existe pas.
+    """
+    path = registry.model_file(counter_name)
+    if path is not None:
+        model = xgb.XGBRegressor()
+        model.load_model(path)
+        return model
+    path = model_path(counter_name)
+    return joblib.load(path) if path.exists() else None
+
+def load_training_state():
+    """
+    Point de reprise des modèles du run courant du registre (ré-entraînement incrémental) :
+    {modèle: {"watermark", "val_mae_ref", "params"}}, {} sans run promu.
+    """
+    manifest = registry.load_manifest()
+    if manifest is None:
+        return {}
+    return {
+        name: {"watermark": entry["watermark"], "val_mae_ref": entry["metrics"].get("MAE val réf"),
+               "params": entry.get("params")}
+        for name, entry in manifest["models"].items()
+    }